@@ -1,18 +1,29 @@
+import time
+STARTUP_STARTED = time.perf_counter() # Taken before anything else so --startup-time covers all imports
+
+import subprocess
+import sys
+import threading
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
-from tkcalendar import Calendar
-import pandas as pd
 import os
+from collections import deque
 from datetime import datetime
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-from matplotlib.figure import Figure
+from appointment_store import data_version, ensure_schema
+from excel_export import stream_workbook
+from tk_views import BackgroundLoader, GanttChart, TreeviewSync
+# pandas, tkcalendar and matplotlib are imported where they are first used,
+# after the window is on screen, so they do not delay startup
 
 # =============================================================================
 # --- 1. Constants and Initial Setup ---
 # =============================================================================
 FILE_NAME = "data.csv"
 APP_TITLE = "Thai Traditional Massage Queue System"
+UPCOMING_REFRESH_MS = 60 * 1000 # Auto-refresh interval for the upcoming list
+SNAPSHOT_MS = 60 * 60 * 1000 # Backup interval for data.csv (see snapshots.py)
+MEASURE_STARTUP = "--startup-time" in sys.argv # Print startup timings, log them and exit
+STARTUP_LOG = "startup_times.csv"
 
 # Color Palette
 PRIMARY_COLOR = "#2C3E50"   # Dark Blue/Grey for main elements
@@ -26,24 +37,14 @@ SUBHEADER_FONT = ("Segoe UI", 13, "bold")
 NORMAL_FONT = ("Segoe UI", 10)
 BUTTON_FONT = ("Segoe UI", 10, "bold")
 
-# Ensure the data file exists and has all columns
-REQUIRED_COLUMNS = ["Name", "Date", "StartTime", "EndTime", "Phone", "Note"]
-if not os.path.exists(FILE_NAME):
-    df = pd.DataFrame(columns=REQUIRED_COLUMNS)
-    df.to_csv(FILE_NAME, index=False)
-else:
-    # Check if existing CSV has new columns, add if missing
-    # Explicitly specify dtype for 'Phone' column to be string
-    df = pd.read_csv(FILE_NAME, dtype={'Phone': str})
-    for col in REQUIRED_COLUMNS:
-        if col not in df.columns:
-            df[col] = '' # Add missing column with empty string as default
-    df = df[REQUIRED_COLUMNS] # Ensure column order
-    df.to_csv(FILE_NAME, index=False)
-
-
 # Global variable to store the currently selected date for filtering
 current_selected_date = None
+# Time-ordered cursor over all bookings, rebuilt only when data.csv changes
+upcoming_cursor = None
+# Date picker, created by build_calendar() after the window appears
+calendar = None
+# (stage, milliseconds since launch) collected in --startup-time mode
+startup_timings = []
 
 # =============================================================================
 # --- 2. Core Functions ---
@@ -100,6 +101,10 @@ def save_data():
         messagebox.showerror("Error", "An unexpected time format error occurred. Please check your input.")
         return
 
+    import pandas as pd
+    from change_feed import publish_changes
+    from rollups import record_change
+
     # Read CSV, explicitly specifying dtype for 'Phone'
     df = pd.read_csv(FILE_NAME, dtype={'Phone': str})
 
@@ -121,7 +126,11 @@ def save_data():
     # Add Phone and Note to the new row
     new_row = pd.DataFrame([[name, date_formatted, start, end, phone, note]], 
                            columns=["Name", "Date", "StartTime", "EndTime", "Phone", "Note"])
+    before = data_version(FILE_NAME)
     new_row.to_csv(FILE_NAME, mode='a', header=False, index=False)
+    after = data_version(FILE_NAME)
+    record_change(before, after, new=new_row.iloc[0].to_dict(), file_name=FILE_NAME)
+    publish_changes(before, after, [(None, new_row.iloc[0].to_dict())], file_name=FILE_NAME)
     messagebox.showinfo("Success", "Appointment saved!")
 
     name_entry.delete(0, tk.END)
@@ -138,182 +147,155 @@ def save_data():
 def load_data(selected_date=None, filter_name=""):
     """
     Loads appointment data into the main Treeview and draws Gantt chart.
-    Can also filter by name.
+    Can also filter by name. Reading and filtering run on the background
+    loader; only the widget updates run on the Tk thread.
     """
     global current_selected_date
     current_selected_date = selected_date
 
-    for row in tree.get_children():
-        tree.delete(row)
-    try:
-        # Read CSV, explicitly specifying dtype for 'Phone'
-        df = pd.read_csv(FILE_NAME, dtype={'Phone': str})
-        # Ensure 'Phone' and 'Note' columns exist when loading
-        for col in ["Phone", "Note"]:
-            if col not in df.columns:
-                df[col] = ''
-
-        df['Date'] = pd.to_datetime(df['Date']).dt.strftime('%Y-%m-%d')
-
-        df_filtered_by_date = df[df["Date"] == selected_date] if selected_date else df.copy()
-
-        if filter_name:
-            df_filtered = df_filtered_by_date[df_filtered_by_date["Name"].str.contains(filter_name, case=False, na=False)]
-        else:
-            df_filtered = df_filtered_by_date
-
-        for _, row in df_filtered.iterrows():
-            tree.insert("", "end", values=list(row[["Name", "Date", "StartTime", "EndTime", "Phone", "Note"]]))
-
-        if selected_date:
-            draw_gantt_chart(df_filtered_by_date, selected_date)
-        else:
-            # Clear previous chart elements
-            for widget in chart_frame.winfo_children():
-                widget.destroy()
-            if hasattr(root, '_gantt_canvas') and root._gantt_canvas:
-                root._gantt_canvas.get_tk_widget().destroy() # Destroy the canvas widget
-                root._gantt_canvas = None # Clear the reference
-            tk.Label(chart_frame, text="Select a date from the calendar to view its schedule.",
-                     bg=BACKGROUND_COLOR, fg=TEXT_COLOR, font=SUBHEADER_FONT).pack(pady=20)
-
-    except Exception as e:
-        messagebox.showerror("Error", f"Failed to load data: {e}")
+    loader.submit("appointments",
+                  lambda: read_appointments(selected_date, filter_name),
+                  lambda result: show_appointments(result, selected_date),
+                  lambda e: messagebox.showerror("Error", f"Failed to load data: {e}"))
 
     load_upcoming(filter_name=upcoming_filter_entry.get().strip())
 
-def draw_gantt_chart(df_data, selected_date):
-    """Draws a Gantt-like chart for appointments of a selected date."""
-    # Clear existing widgets in the chart_frame
-    for widget in chart_frame.winfo_children():
-        widget.destroy()
-    # Also ensure any old canvas is destroyed
-    if hasattr(root, '_gantt_canvas') and root._gantt_canvas:
-        root._gantt_canvas.get_tk_widget().destroy()
-        root._gantt_canvas = None
-
-    if df_data.empty:
-        tk.Label(chart_frame, text=f"No appointments for {selected_date}",
-                     bg=BACKGROUND_COLOR, fg=TEXT_COLOR, font=SUBHEADER_FONT).pack(pady=20)
-        return
-
-    df_data = df_data.copy()
-    df_data["StartTimeFull"] = pd.to_datetime(selected_date + " " + df_data["StartTime"])
-    df_data["EndTimeFull"] = pd.to_datetime(selected_date + " " + df_data["EndTime"])
-    df_data = df_data.sort_values(by="StartTimeFull")
-
-    fig = Figure(figsize=(9, max(4, len(df_data) * 0.7)), dpi=100, facecolor=BACKGROUND_COLOR)
-    ax = fig.add_subplot(111)
-
-    colors = [plt.cm.tab10(i) for i in range(len(df_data))]
-
-    for i, (_, row) in enumerate(df_data.iterrows()):
-        start = row["StartTimeFull"]
-        end = row["EndTimeFull"]
-        duration_minutes = (end - start).total_seconds() / 60
-        start_minute_of_day = start.hour * 60 + start.minute
-
-        ax.barh(i, duration_minutes, left=start_minute_of_day,
-                color=colors[i], height=0.6, edgecolor='black', linewidth=0.8)
-
-        text_x_pos = start_minute_of_day + 5
-        ax.text(text_x_pos, i, f"{row['Name']} ({start.strftime('%H:%M')}-{end.strftime('%H:%M')})",
-                va='center', ha='left', color='black', fontsize=7, weight='bold')
-
-    ax.set_xlim(0, 1440) # Full 24 hours in minutes
-
-    major_ticks = range(0, 1441, 60)
-    minor_ticks = range(0, 1441, 30)
-    ax.set_xticks(major_ticks)
-    ax.set_xticks(minor_ticks, minor=True)
+def read_appointments(selected_date, filter_name):
+    """Background half of load_data: reads and filters the CSV without touching any widget."""
+    import pandas as pd
+    # Read CSV, explicitly specifying dtype for 'Phone'
+    df = pd.read_csv(FILE_NAME, dtype={'Phone': str})
+    # Ensure 'Phone' and 'Note' columns exist when loading
+    for col in ["Phone", "Note"]:
+        if col not in df.columns:
+            df[col] = ''
 
-    ax.set_xticklabels([f"{h:02d}:00" for h in range(25)], fontsize=8)
+    df['Date'] = pd.to_datetime(df['Date']).dt.strftime('%Y-%m-%d')
 
-    ax.set_yticks([])
-    ax.invert_yaxis()
+    df_filtered_by_date = df[df["Date"] == selected_date] if selected_date else df.copy()
 
-    ax.set_xlabel("Time of Day", fontsize=8, color=TEXT_COLOR)
-    ax.set_title(f"Appointment Schedule for {selected_date}", fontsize=12, color=PRIMARY_COLOR, weight='bold')
+    if filter_name:
+        df_filtered = df_filtered_by_date[df_filtered_by_date["Name"].str.contains(filter_name, case=False, na=False)]
+    else:
+        df_filtered = df_filtered_by_date
 
-    ax.xaxis.grid(True, which='major', linestyle='--', linewidth=0.5, color='gray', alpha=0.7)
-    ax.xaxis.grid(True, which='minor', linestyle=':', linewidth=0.3, color='gray', alpha=0.5)
-    ax.set_facecolor("lightgray")
+    columns = ["Name", "Date", "StartTime", "EndTime", "Phone", "Note"]
+    rows = list(zip(df_filtered.index, df_filtered[columns].values.tolist()))
+    return rows, df_filtered_by_date
 
-    fig.tight_layout()
+def show_appointments(result, selected_date):
+    """Tk-thread half of load_data: updates the Treeview and the Gantt chart."""
+    rows, df_filtered_by_date = result
+    report_startup("data loaded")
+    # Only rows that differ from what is already displayed touch the Treeview
+    tree_sync.sync(rows)
 
-    canvas = FigureCanvasTkAgg(fig, master=chart_frame)
-    canvas.draw()
-    canvas_widget = canvas.get_tk_widget()
-    canvas_widget.pack(fill='both', expand=True, padx=5, pady=2)
+    if selected_date:
+        draw_gantt_chart(df_filtered_by_date, selected_date)
+    else:
+        gantt_chart.show_message("Select a date from the calendar to view its schedule.")
 
-    root._gantt_canvas = canvas
+def draw_gantt_chart(df_data, selected_date):
+    """Draws a Gantt-like chart for appointments of a selected date."""
+    # The chart keeps one canvas and skips the redraw if the day's rows are unchanged
+    gantt_chart.show(df_data, selected_date)
 
 def export_to_excel():
     """
     Exports all appointment data to an Excel file, allowing the user to choose the save location.
-    Data is organized into sheets by year, and within each sheet, appointments are grouped by month.
+    Data is organized into sheets by year, sorted by date. The workbook is streamed in
+    constant memory on the background loader, so large histories neither exhaust memory
+    nor freeze the window.
     """
-    try:
-        # Read CSV, explicitly specifying dtype for 'Phone'
-        df = pd.read_csv(FILE_NAME, dtype={'Phone': str})
-        
-        # Ensure 'Phone' and 'Note' columns exist before exporting
-        for col in ["Phone", "Note"]:
-            if col not in df.columns:
-                df[col] = ''
-        
-        # Convert 'Date' column to datetime objects
-        df['Date'] = pd.to_datetime(df['Date'])
-        
-        # Add 'Year' and 'Month' columns for grouping
-        df['Year'] = df['Date'].dt.year
-        df['Month'] = df['Date'].dt.strftime('%B') # Full month name, e.g., 'July'
-
-        # Open a file dialog to ask for the save location
-        file_path = filedialog.asksaveasfilename(
-            defaultextension=".xlsx",
-            filetypes=[("Excel files", "*.xlsx"), ("All files", "*.*")],
-            title="Save Appointment Schedule as"
-        )
-
-        if file_path:  # If the user didn't cancel the dialog
-            with pd.ExcelWriter(file_path, engine='xlsxwriter') as writer:
-                # Get unique years and sort them
-                years = df['Year'].unique()
-                years.sort()
-
-                for year in years:
-                    df_year = df[df['Year'] == year].copy()
-                    
-                    # Sort by Date, then StartTime
-                    df_year = df_year.sort_values(by=['Date', 'StartTime'])
-
-                    # Prepare the data for the sheet (excluding the temporary 'Year' column)
-                    # We add 'Month' column at the beginning for better organization within the sheet
-                    columns_to_export = ["Date", "Name", "StartTime", "EndTime", "Phone", "Note"]
-                    df_year_for_export = df_year[['Month'] + columns_to_export]
-                    
-                    # Write the year's data to a new sheet named after the year
-                    sheet_name = str(year)
-                    df_year_for_export.to_excel(writer, sheet_name=sheet_name, index=False)
-
-                    # Optional: Add some formatting or notes to the sheet
-                    workbook = writer.book
-                    worksheet = writer.sheets[sheet_name]
-                    
-                    # Auto-fit columns
-                    for i, col in enumerate(df_year_for_export.columns):
-                        max_len = max(df_year_for_export[col].astype(str).map(len).max(), len(col)) + 2
-                        worksheet.set_column(i, i, max_len)
-
-            messagebox.showinfo("Success", f"Exported to '{os.path.basename(file_path)}'")
+    # Open a file dialog to ask for the save location
+    file_path = filedialog.asksaveasfilename(
+        defaultextension=".xlsx",
+        filetypes=[("Excel files", "*.xlsx"), ("All files", "*.*")],
+        title="Save Appointment Schedule as"
+    )
+    if not file_path:  # If the user cancelled the dialog
+        messagebox.showinfo("Export Cancelled", "Excel export was cancelled.")
+        return
+
+    def export_done(result):
+        written, skipped = result
+        message = f"Exported {written} appointments to '{os.path.basename(file_path)}'"
+        if skipped:
+            message += f"\n{skipped} rows with an unreadable date were skipped."
+        messagebox.showinfo("Success", message)
+
+    def export_failed(error):
+        if isinstance(error, ImportError):
+            messagebox.showerror("Export Failed", "Module 'xlsxwriter' not found. Please install it: pip install xlsxwriter")
         else:
-            messagebox.showinfo("Export Cancelled", "Excel export was cancelled.")
+            messagebox.showerror("Export Failed", f"Export failed: {error}")
 
-    except ImportError:
-        messagebox.showerror("Export Failed", "Module 'openpyxl' or 'xlsxwriter' not found. Please install them: pip install openpyxl xlsxwriter")
-    except Exception as e:
-        messagebox.showerror("Export Failed", f"Export failed: {e}")
+    loader.submit("export", lambda: stream_workbook(file_path, FILE_NAME), export_done, export_failed, slow=True)
+
+def run_tool(script, args, report):
+    """
+    Runs one of the batch scripts next to this file in its own Python process
+    and passes each line it prints to report(). Their process pools must not
+    start from here: on Windows the worker processes would re-run this GUI script.
+    """
+    script_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), script)
+    command = [sys.executable, script_path] + args + ["--file", os.path.abspath(FILE_NAME)]
+    process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, encoding="utf-8",
+                               errors="replace")
+    # stderr is drained on its own thread: warnings (e.g. missing Thai glyphs) could otherwise fill
+    # the pipe while we wait on stdout, and both processes would block
+    errors = deque(maxlen=20)
+    drain = threading.Thread(target=lambda: errors.extend(line.strip() for line in process.stderr if line.strip()),
+                             daemon=True)
+    drain.start()
+    for line in process.stdout:
+        report(line.strip())
+    drain.join()
+    if process.wait() != 0:
+        raise RuntimeError(errors[-1] if errors else f"exit code {process.returncode}")
+
+def tool_finished(message):
+    """Returns an on_done callback that restores the header label and shows `message`."""
+    def finished(result):
+        loading_label.configure(text="⏳ Loading...")
+        messagebox.showinfo("Success", message)
+    return finished
+
+def tool_failed(title):
+    def failed(error):
+        loading_label.configure(text="⏳ Loading...")
+        messagebox.showerror(title, f"{title}: {error}")
+    return failed
+
+def generate_batch_reports():
+    """Writes one workbook per month or per year into a zip chosen by the user."""
+    per_month = messagebox.askyesnocancel("Batch Reports", "Create one workbook per month?\n\nYes = per month, No = per year")
+    if per_month is None:
+        return
+    zip_path = filedialog.asksaveasfilename(
+        defaultextension=".zip",
+        filetypes=[("Zip archives", "*.zip"), ("All files", "*.*")],
+        title="Save Batch Reports as"
+    )
+    if not zip_path:
+        return
+    args = ["--by", "month" if per_month else "year", "--out", os.path.splitext(zip_path)[0], "--zip", zip_path]
+
+    loader.submit("reports", lambda report: run_tool("batch_reports.py", args, report),
+                  tool_finished(f"Reports saved to '{os.path.basename(zip_path)}'"),
+                  tool_failed("Report generation failed"),
+                  on_progress=lambda line: loading_label.configure(text=f"⏳ Reports {line}"), slow=True)
+
+def print_schedule_sheet():
+    """Renders a printable PDF schedule for the selected date (or today) into the chosen folder."""
+    day = current_selected_date or datetime.now().strftime("%Y-%m-%d")
+    out_dir = filedialog.askdirectory(title=f"Save Schedule Sheet for {day} in")
+    if not out_dir:
+        return
+    loader.submit("sheets", lambda report: run_tool("schedule_sheets.py", [day, "--out", out_dir], report),
+                  tool_finished(f"Saved '{os.path.join(out_dir, f'schedule_{day}.pdf')}'"),
+                  tool_failed("Schedule sheet failed"),
+                  on_progress=lambda line: loading_label.configure(text=f"⏳ Sheets {line}"), slow=True)
 
 def on_calendar_select(event=None):
     """Callback when a date is selected on the calendar."""
@@ -335,11 +317,13 @@ def on_calendar_select(event=None):
     except Exception as e:
         messagebox.showerror("Error", f"An error occurred during date selection:\n{e}")
 
-def load_upcoming(filter_name=""):
-    """Loads and displays upcoming appointments in a separate Treeview."""
-    for row in upcoming_tree.get_children():
-        upcoming_tree.delete(row)
-    try:
+def get_upcoming_cursor():
+    """Returns the upcoming-appointments cursor, rebuilding it only when the CSV has changed."""
+    global upcoming_cursor
+    version = data_version(FILE_NAME)
+    if upcoming_cursor is None or upcoming_cursor.version != version:
+        import pandas as pd
+        from appointment_index import UpcomingCursor
         # Read CSV, explicitly specifying dtype for 'Phone'
         df = pd.read_csv(FILE_NAME, dtype={'Phone': str})
         # Ensure 'Phone' and 'Note' columns exist when loading
@@ -347,28 +331,37 @@ def load_upcoming(filter_name=""):
             if col not in df.columns:
                 df[col] = ''
         df['Date'] = pd.to_datetime(df['Date']).dt.strftime('%Y-%m-%d')
+        upcoming_cursor = UpcomingCursor(df, version=version)
+    return upcoming_cursor
 
-        df["StartDatetime"] = pd.to_datetime(df["Date"] + " " + df["StartTime"])
-        df["EndDatetime"] = pd.to_datetime(df["Date"] + " " + df["EndTime"])
-        now = datetime.now()
-
-        df = df[df["EndDatetime"] >= now]
-        df = df.sort_values(by="StartDatetime")
-
-        if filter_name:
-            df = df[df["Name"].str.contains(filter_name, case=False, na=False)]
-
-        for _, row in df.iterrows():
-            upcoming_tree.insert("", "end", values=[
-                row["Date"],
-                row["Name"],
-                row["StartTime"],
-                row["EndTime"],
-                row["Phone"],
-                row["Note"]
-            ])
-    except Exception as e:
-        messagebox.showerror("Error", f"Failed to load upcoming appointments:\n{e}")
+def load_upcoming(filter_name=""):
+    """Loads and displays upcoming appointments in a separate Treeview."""
+    def read_upcoming():
+        # Appointments stay listed until their end time has passed
+        upcoming = get_upcoming_cursor().upcoming(datetime.now(), include_ongoing=True, filter_name=filter_name)
+        return [(idx, [
+            row["Date"],
+            row["Name"],
+            row["StartTime"],
+            row["EndTime"],
+            row["Phone"],
+            row["Note"]
+        ]) for idx, row in upcoming]
+
+    loader.submit("upcoming", read_upcoming, upcoming_sync.sync,
+                  lambda e: messagebox.showerror("Error", f"Failed to load upcoming appointments:\n{e}"))
+
+def auto_refresh_upcoming():
+    """Refreshes the upcoming list periodically so finished appointments roll off."""
+    load_upcoming(filter_name=upcoming_filter_entry.get().strip())
+    root.after(UPCOMING_REFRESH_MS, auto_refresh_upcoming)
+
+def auto_snapshot():
+    """Takes an incremental backup of data.csv every hour; unchanged data writes nothing."""
+    from snapshots import take_snapshot
+    loader.submit("snapshot", lambda: take_snapshot(FILE_NAME), lambda result: None,
+                  lambda e: print(f"Backup snapshot failed: {e}", file=sys.stderr), slow=True)
+    root.after(SNAPSHOT_MS, auto_snapshot)
 
 def go_home():
     """Resets the view to show all appointments and the main title."""
@@ -379,15 +372,7 @@ def go_home():
     root.title(f"Home | {APP_TITLE}")
     load_data(selected_date=None)
     calendar.selection_clear()
-
-    # Clear previous chart elements
-    for widget in chart_frame.winfo_children():
-        widget.destroy()
-    if hasattr(root, '_gantt_canvas') and root._gantt_canvas:
-        root._gantt_canvas.get_tk_widget().destroy() # Destroy the canvas widget
-        root._gantt_canvas = None # Clear the reference
-    tk.Label(chart_frame, text="Select a date from the calendar to view its schedule.",
-             bg=BACKGROUND_COLOR, fg=TEXT_COLOR, font=SUBHEADER_FONT).pack(pady=20)
+    gantt_chart.show_message("Select a date from the calendar to view its schedule.")
 
 def apply_filter(event=None):
     """Applies the name filter to the current selected date's appointments."""
@@ -397,6 +382,52 @@ def apply_upcoming_filter(event=None):
     """Applies the name filter to upcoming appointments."""
     load_upcoming(filter_name=upcoming_filter_entry.get().strip())
 
+def build_calendar():
+    """Creates the date picker in its placeholder; tkcalendar is only imported here."""
+    global calendar
+    from tkcalendar import Calendar
+    calendar_placeholder.destroy()
+    # Ensure calendar date_pattern outputs 4-digit year to match common datetime formats
+    calendar = Calendar(calendar_frame, selectmode="day", date_pattern="mm/dd/yyyy", 
+                        background=PRIMARY_COLOR, foreground='white',
+                        headersbackground=ACCENT_COLOR, normalbackground='white',
+                        font=NORMAL_FONT, borderwidth=1, relief="ridge")
+    calendar.pack(fill='x')
+    calendar.bind("<<CalendarSelected>>", on_calendar_select)
+
+def finish_startup():
+    """Second startup phase, run once the window is already on screen."""
+    report_startup("window shown")
+    build_calendar()
+    report_startup("calendar ready")
+    # Only rewrites data.csv when the schema marker says it is out of date
+    ensure_schema(FILE_NAME)
+    load_data(selected_date=None)
+    root.after(UPCOMING_REFRESH_MS, auto_refresh_upcoming)
+    if not MEASURE_STARTUP:
+        root.after(UPCOMING_REFRESH_MS, auto_snapshot)
+
+def report_startup(stage):
+    """
+    Records how long after launch a startup stage was reached. Only active
+    with --startup-time: the first data load ends the run, and the timings
+    are printed and appended to STARTUP_LOG so cold starts can be compared.
+    """
+    if not MEASURE_STARTUP or any(name == stage for name, _ in startup_timings):
+        return
+    elapsed_ms = (time.perf_counter() - STARTUP_STARTED) * 1000
+    startup_timings.append((stage, elapsed_ms))
+    print(f"{stage}: {elapsed_ms:.0f} ms")
+    if stage != "data loaded":
+        return
+
+    new_log = not os.path.exists(STARTUP_LOG)
+    with open(STARTUP_LOG, "a", encoding="utf-8") as f:
+        if new_log:
+            f.write("timestamp," + ",".join(name.replace(" ", "_") + "_ms" for name, _ in startup_timings) + "\n")
+        f.write(datetime.now().isoformat(timespec="seconds") + "," + ",".join(f"{ms:.0f}" for _, ms in startup_timings) + "\n")
+    root.quit()
+
 
 # =============================================================================
 # --- 3. GUI Setup ---
@@ -432,6 +463,17 @@ tk.Label(header_frame, text=APP_TITLE, font=HEADER_FONT, fg="white", bg=PRIMARY_
 go_home_button = ttk.Button(header_frame, text="🏠 Home", command=go_home, style='TButton')
 go_home_button.pack(side=tk.RIGHT, padx=8)
 
+# Loading indicator, shown while the background loader has work in flight
+loading_label = tk.Label(header_frame, text="⏳ Loading...", font=NORMAL_FONT, fg="white", bg=PRIMARY_COLOR)
+
+def show_loading(busy):
+    if busy:
+        loading_label.pack(side=tk.RIGHT, padx=8)
+    else:
+        loading_label.pack_forget()
+
+loader = BackgroundLoader(root, on_busy=show_loading)
+
 # --- Canvas for scrollable content ---
 main_canvas = tk.Canvas(root, bg=BACKGROUND_COLOR, highlightthickness=0)
 main_canvas.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
@@ -472,13 +514,11 @@ phone_entry = ttk.Entry(left_panel, font=NORMAL_FONT, width=30)
 phone_entry.pack(pady=(0, 10), padx=5, fill='x')
 
 tk.Label(left_panel, text="Select Date:", bg=BACKGROUND_COLOR, fg=TEXT_COLOR, font=NORMAL_FONT).pack(anchor='w', padx=5, pady=(4, 0))
-# Ensure calendar date_pattern outputs 4-digit year to match common datetime formats
-calendar = Calendar(left_panel, selectmode="day", date_pattern="mm/dd/yyyy", 
-                    background=PRIMARY_COLOR, foreground='white',
-                    headersbackground=ACCENT_COLOR, normalbackground='white',
-                    font=NORMAL_FONT, borderwidth=1, relief="ridge")
-calendar.pack(pady=(0, 10), padx=5, fill='x')
-calendar.bind("<<CalendarSelected>>", on_calendar_select)
+# The calendar itself is built by build_calendar() once the window is showing
+calendar_frame = tk.Frame(left_panel, bg=BACKGROUND_COLOR)
+calendar_frame.pack(pady=(0, 10), padx=5, fill='x')
+calendar_placeholder = tk.Label(calendar_frame, text="⏳ Loading calendar...", bg=BACKGROUND_COLOR, fg=TEXT_COLOR, font=NORMAL_FONT, height=10)
+calendar_placeholder.pack(fill='x')
 
 # --- Start Time Spinboxes ---
 tk.Label(left_panel, text="Start Time:", bg=BACKGROUND_COLOR, fg=TEXT_COLOR, font=NORMAL_FONT).pack(anchor='w', padx=5, pady=(4, 0))
@@ -517,6 +557,8 @@ button_frame = tk.Frame(left_panel, bg=BACKGROUND_COLOR, pady=10)
 button_frame.pack(fill='x', expand=False)
 ttk.Button(button_frame, text="➕ Save Appointment", command=save_data, style='TButton').pack(side=tk.LEFT, padx=5, pady=5, expand=True, fill='x')
 ttk.Button(button_frame, text="📊 Export to Excel", command=export_to_excel, style='TButton').pack(side=tk.LEFT, padx=5, pady=5, expand=True, fill='x')
+ttk.Button(left_panel, text="🗂 Batch Reports", command=generate_batch_reports, style='TButton').pack(padx=5, pady=(0, 5), fill='x')
+ttk.Button(left_panel, text="🖨 Print Schedule Sheet", command=print_schedule_sheet, style='TButton').pack(padx=5, pady=(0, 5), fill='x')
 
 # --- Right Panel for Displays (Treeviews and Gantt Chart) ---
 right_panel = tk.Frame(content_frame, bg=BACKGROUND_COLOR, padx=10, pady=10)
@@ -564,6 +606,7 @@ upcoming_tree.column("Phone", anchor="center", width=100)
 upcoming_tree.column("Note", anchor="w", width=180)
 upcoming_tree.pack(fill='both', expand=True)
 upcoming_scroll.config(command=upcoming_tree.yview)
+upcoming_sync = TreeviewSync(upcoming_tree, root)
 
 # Current Day Appointments Section (Treeview)
 tk.Label(right_panel, text="📅 Appointments for Selected Date", font=SUBHEADER_FONT, fg=PRIMARY_COLOR, bg=BACKGROUND_COLOR).grid(row=3, column=0, pady=(8, 10), sticky='ew')
@@ -600,20 +643,22 @@ tree.column("Phone", anchor="center", width=100)
 tree.column("Note", anchor="w", width=180)
 tree.pack(fill='both', expand=True)
 tree_scroll.config(command=tree.yview)
+tree_sync = TreeviewSync(tree, root)
 
 # Gantt Chart Frame
 tk.Label(right_panel, text="📊 Daily Appointment Gantt Chart", font=SUBHEADER_FONT, fg=PRIMARY_COLOR, bg=BACKGROUND_COLOR).grid(row=6, column=0, pady=(8, 10), sticky='ew')
 chart_frame = tk.Frame(right_panel, bg=BACKGROUND_COLOR, bd=2, relief="solid")
 chart_frame.grid(row=7, column=0, pady=(0, 8), padx=4, sticky='nsew')
 
-tk.Label(chart_frame, text="Select a date from the calendar to view its schedule.",
-         bg=BACKGROUND_COLOR, fg=TEXT_COLOR, font=SUBHEADER_FONT).pack(pady=20)
+gantt_chart = GanttChart(chart_frame, BACKGROUND_COLOR, PRIMARY_COLOR, TEXT_COLOR, SUBHEADER_FONT)
+gantt_chart.show_message("Select a date from the calendar to view its schedule.")
 
 
 # =============================================================================
 # --- 4. Initial Data Load & Main Loop ---
 # =============================================================================
-load_upcoming(filter_name="")
-load_data(selected_date=None)
+# Paint the window first; the calendar, schema check and data load follow
+root.update()
+root.after(0, finish_startup)
 
 root.mainloop()
\ No newline at end of file
@@ -0,0 +1,116 @@
+import threading
+from bisect import bisect_left, bisect_right
+from datetime import datetime, time, timedelta
+from itertools import chain
+import pandas as pd
+
+
+# ------------------------ Sorted Index ------------------------
+class AppointmentIndex:
+    """
+    Appointments sorted by (Date, StartTime, id) for keyset pagination.
+    A cursor is one of those keys, so any page is a bisect plus a slice
+    and page 500 costs the same as page 1.
+    """
+
+    def __init__(self, df, search_name=""):
+        if search_name:
+            df = df[df["Name"].str.contains(search_name, case=False, na=False, regex=False)]
+        ids = df.index.tolist()
+        self.keys = sorted(zip(df["Date"].astype(str), df["StartTime"].astype(str), ids))
+        self.rows = dict(zip(ids, df.to_dict("records")))
+
+    def __len__(self):
+        return len(self.keys)
+
+    def rank(self, cursor):
+        """Position of the first key at or after the cursor."""
+        return bisect_left(self.keys, tuple(cursor))
+
+    def page_after(self, cursor, limit):
+        """Returns up to `limit` keys strictly after the cursor (None = from the start)."""
+        start = 0 if cursor is None else bisect_right(self.keys, tuple(cursor))
+        return self.keys[start:start + limit]
+
+    def page_before(self, cursor, limit):
+        """Returns up to `limit` keys strictly before the cursor (None = from the end)."""
+        end = len(self.keys) if cursor is None else bisect_left(self.keys, tuple(cursor))
+        return self.keys[max(0, end - limit):end]
+
+    def fetch(self, page):
+        """Resolves page keys to (id, row) pairs."""
+        return [(key[2], self.rows[key[2]]) for key in page]
+
+
+# ------------------------ Upcoming Cursor ------------------------
+class UpcomingCursor:
+    """
+    Appointments sorted by start time with a "now" pointer that only moves
+    forward. Listing the next k bookings is a bisect from the pointer plus a
+    slice, so past bookings are never rescanned and roll off as time passes.
+    """
+
+    def __init__(self, df, version=None):
+        self.version = version
+        starts = pd.to_datetime(df["Date"].astype(str) + " " + df["StartTime"].astype(str), errors="coerce")
+        ends = pd.to_datetime(df["Date"].astype(str) + " " + df["EndTime"].astype(str), errors="coerce")
+        valid = starts.notna() & ends.notna()
+        entries = sorted(zip(starts[valid].dt.to_pydatetime(), ends[valid].dt.to_pydatetime(), df.index[valid]))
+        self.starts = [e[0] for e in entries]
+        self.entries = entries
+        self.rows = dict(zip(df.index, df.to_dict("records")))
+        # Longest booking bounds how far back an ongoing appointment can have started
+        self.max_duration = max((e[1] - e[0] for e in entries), default=timedelta(0))
+        self._now = datetime.min
+        self._pos = 0
+        self._lock = threading.Lock()  # One cursor is shared by every Streamlit session
+
+    def advance(self, now):
+        """Moves the pointer to the first appointment starting at or after `now`."""
+        with self._lock:
+            lo = self._pos if now >= self._now else 0
+            pos = bisect_left(self.starts, now, lo=lo)
+            if now >= self._now:
+                self._now, self._pos = now, pos
+        return pos
+
+    def upcoming(self, now, limit=None, include_ongoing=False, filter_name="", until=None):
+        """
+        Returns (id, row) pairs in start order, optionally only those starting
+        before `until`. With include_ongoing, bookings that started before
+        `now` but have not ended yet are included too.
+        """
+        pos = self.advance(now)
+        end = len(self.entries) if until is None else bisect_left(self.starts, until, lo=pos)
+        ongoing = []
+        if include_ongoing:
+            lo = bisect_left(self.starts, now - self.max_duration, hi=pos)
+            ongoing = [e for e in self.entries[lo:pos] if e[1] >= now]
+
+        needle = filter_name.lower()
+        result = []
+        for _, _, idx in chain(ongoing, (self.entries[i] for i in range(pos, end))):
+            if limit is not None and len(result) >= limit:
+                break
+            row = self.rows[idx]
+            if needle and needle not in str(row["Name"]).lower():
+                continue
+            result.append((idx, row))
+        return result
+
+    def count(self, start, end=None):
+        """Number of bookings starting in [start, end); end=None counts to the last booking."""
+        hi = len(self.starts) if end is None else bisect_left(self.starts, end)
+        return max(hi - bisect_left(self.starts, start), 0)
+
+    def daily_counts(self, start, end):
+        """(date, count) for each day in [start, end) that has bookings, two bisects per day."""
+        counts = []
+        day = start
+        while day < end:
+            next_day = min(datetime.combine(day.date() + timedelta(days=1), time()), end)
+            n = self.count(day, next_day)
+            if n:
+                counts.append((day.date(), n))
+            day = next_day
+        return counts
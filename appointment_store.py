@@ -0,0 +1,111 @@
+import json
+import os
+import threading
+from contextlib import contextmanager
+
+# ------------------------ Configuration ------------------------
+FILE_NAME = "data.csv"
+COLUMNS = ["Name", "Date", "StartTime", "EndTime", "Phone", "Note"]
+SCHEMA_VERSION = 1  # Bump when COLUMNS changes so existing files are migrated once
+
+
+# ------------------------ Store Helpers ------------------------
+def data_version(file_name=FILE_NAME):
+    """Returns a cheap token that changes whenever the CSV file is rewritten."""
+    try:
+        stat = os.stat(file_name)
+    except FileNotFoundError:
+        return (0, 0)
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+def load_appointments(file_name=FILE_NAME):
+    """Reads the appointment CSV with Phone kept as text."""
+    import pandas as pd  # Imported on first use so callers that only need data_version start fast
+    if not os.path.exists(file_name):
+        return pd.DataFrame(columns=COLUMNS)
+    return pd.read_csv(file_name, dtype={"Phone": str})
+
+
+@contextmanager
+def file_lock(path):
+    """Exclusive lock on `path`.lock, shared by every process that writes `path` (Tk, Streamlit, scripts)."""
+    with open(path + ".lock", "a+b") as f:
+        if os.name == "nt":
+            import msvcrt
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)  # Retries for up to 10 seconds
+            try:
+                yield
+            finally:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+        else:
+            import fcntl
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def temp_name(path):
+    """A temp path next to `path`, unique per process and thread, to write before os.replace()."""
+    return f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+
+
+def write_atomic(path, data, fsync=False):
+    """Writes bytes through a temp file and a rename, so readers and crashes never see half a file."""
+    temp_path = temp_name(path)
+    with open(temp_path, "wb") as f:
+        f.write(data)
+        if fsync:
+            f.flush()
+            os.fsync(f.fileno())
+    os.replace(temp_path, path)
+
+
+def write_json_atomic(path, value):
+    write_atomic(path, json.dumps(value, ensure_ascii=False).encode("utf-8"))
+
+
+# ------------------------ Schema Migration ------------------------
+def schema_marker(file_name=FILE_NAME):
+    return file_name + ".schema"
+
+
+def ensure_schema(file_name=FILE_NAME):
+    """
+    Makes sure the CSV exists with COLUMNS in order. A marker file next to it
+    records the schema version already applied, so a normal start costs one
+    tiny read; the full read and rewrite only runs when the marker is missing
+    or older and the header really differs. Returns True if the file changed.
+    """
+    marker = schema_marker(file_name)
+    changed = False
+    if not os.path.exists(file_name):
+        with open(file_name, "w", encoding="utf-8", newline="") as f:
+            f.write(",".join(COLUMNS) + "\n")
+        changed = True
+    else:
+        try:
+            with open(marker, encoding="utf-8") as f:
+                applied = int(f.read().strip() or 0)
+        except (FileNotFoundError, ValueError):
+            applied = 0
+        if applied >= SCHEMA_VERSION:
+            return False
+
+        with open(file_name, encoding="utf-8", errors="replace") as f:
+            header = f.readline().strip().split(",")
+        if header != COLUMNS:
+            df = load_appointments(file_name)
+            for col in COLUMNS:
+                if col not in df.columns:
+                    df[col] = ''  # Add missing column with empty string as default
+            df[COLUMNS].to_csv(file_name, index=False)
+            changed = True
+
+    with open(marker, "w", encoding="utf-8") as f:
+        f.write(str(SCHEMA_VERSION))
+    return changed
@@ -0,0 +1,107 @@
+import argparse
+import multiprocessing
+import os
+import re
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from appointment_store import FILE_NAME, load_appointments
+from excel_export import SHEET_CACHE_DIR, build_workbook, prune_sheet_cache
+
+# ------------------------ Configuration ------------------------
+REPORT_PREFIX = "appointments"
+
+
+# ------------------------ Partitioning ------------------------
+def partition_keys(df, by):
+    """
+    The report each row belongs to: its year, its YYYY_MM month, or for any
+    other `by` the value of that column (e.g. a therapist column).
+    """
+    dates = df["Date"].astype(str)
+    if by == "year":
+        return dates.str[:4]
+    if by == "month":
+        return dates.str[:7].str.replace("-", "_")
+    if by not in df.columns:
+        raise ValueError(f"Cannot split reports by '{by}': no such column")
+    return df[by].fillna("").astype(str).replace("", "unassigned")
+
+
+def report_file_name(key):
+    # Only characters that are not allowed in Windows file names are replaced, so Thai names survive
+    safe_key = re.sub(r'[\\/:*?"<>|\s]+', "_", key).strip("_.") or "unnamed"
+    return f"{REPORT_PREFIX}_{safe_key}.xlsx"
+
+
+def split_reports(df, by):
+    """Returns [(file name, rows)] with one entry per partition, in key order."""
+    keys = partition_keys(df, by)
+    return [(report_file_name(key), group) for key, group in df.groupby(keys, sort=True)]
+
+
+# ------------------------ Generation ------------------------
+def write_report(path, df, cache_dir):
+    # Runs in a worker process; the sheet cache is shared, pruning is left to the parent
+    build_workbook(df, path, cache_dir=cache_dir, prune=False)
+    return path
+
+
+def generate_reports(df, out_dir, by="month", workers=None, zip_path=None, progress=None,
+                     cache_dir=SHEET_CACHE_DIR):
+    """
+    Writes one workbook per partition into `out_dir`, spreading the
+    workbooks across a process pool. `progress(done, total, file name)` is
+    called in this process as each workbook finishes. With `zip_path` the
+    workbooks are also collected into one zip. Returns the workbook paths in
+    partition order.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    jobs = [(os.path.join(out_dir, name), rows) for name, rows in split_reports(df, by)]
+    total = len(jobs)
+    workers = min(workers or os.cpu_count() or 1, total)
+
+    if workers <= 1:
+        # A single report is not worth starting worker processes for
+        for done, (path, rows) in enumerate(jobs, start=1):
+            write_report(path, rows, cache_dir)
+            if progress is not None:
+                progress(done, total, os.path.basename(path))
+    else:
+        # Spawned, not forked: forking the multi-threaded Streamlit server can copy a held lock into a worker
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as executor:
+            futures = [executor.submit(write_report, path, rows, cache_dir) for path, rows in jobs]
+            for done, future in enumerate(as_completed(futures), start=1):
+                path = future.result()
+                if progress is not None:
+                    progress(done, total, os.path.basename(path))
+    if os.path.isdir(cache_dir):
+        prune_sheet_cache(cache_dir)
+
+    paths = [path for path, _ in jobs]
+    if zip_path:
+        # Workbooks are already deflated inside, so they are stored as-is
+        with zipfile.ZipFile(zip_path, "w", zipfile.ZIP_STORED) as archive:
+            for path in paths:
+                archive.write(path, os.path.basename(path))
+    return paths
+
+
+# ------------------------ Command Line ------------------------
+# Lets the Tkinter client run the pool in its own process (see 6.py)
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Write one appointment workbook per partition.")
+    parser.add_argument("--by", default="month", help="year, month or a column name (default: month)")
+    parser.add_argument("--out", default="reports", help="output directory (default: reports)")
+    parser.add_argument("--zip", dest="zip_path", help="also collect the workbooks into this zip file")
+    parser.add_argument("--workers", type=int, help="worker processes (default: CPU count)")
+    parser.add_argument("--file", default=FILE_NAME, help="appointment CSV (default: data.csv)")
+    args = parser.parse_args(argv)
+
+    paths = generate_reports(load_appointments(args.file), args.out, by=args.by, workers=args.workers,
+                             zip_path=args.zip_path,
+                             progress=lambda done, total, name: print(f"{done}/{total} {name}", flush=True))
+    print(f"Wrote {len(paths)} workbooks to {args.out}" + (f" and {args.zip_path}" if args.zip_path else ""))
+
+
+if __name__ == "__main__":
+    main()
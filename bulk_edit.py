@@ -0,0 +1,42 @@
+import pandas as pd
+from appointment_store import COLUMNS
+
+
+# ------------------------ Row Diff ------------------------
+def diff_rows(original, edited):
+    """
+    Compares the rows shown in a grid with what the user submitted.
+    Returns (updates, deletes, inserts): {id: row dict} for changed rows,
+    a list of removed ids and a list of new row dicts.
+    """
+    original = original[COLUMNS].fillna("").astype(str)
+    edited = edited.reindex(columns=COLUMNS).fillna("").astype(str)
+    # Rows added in the grid have no id of ours (the editor may label them NaN)
+    is_kept = edited.index.isin(original.index)
+    kept = edited[is_kept]
+
+    changed = (kept != original.loc[kept.index]).any(axis=1)
+    updates = kept[changed].to_dict("index")
+    deletes = sorted(set(original.index) - set(kept.index))
+    new_rows = edited[~is_kept]
+    inserts = [row for row in new_rows.to_dict("records") if any(v.strip() for v in row.values())]
+    return updates, deletes, inserts
+
+
+def apply_changes(df, updates, deletes, inserts, reset_ids=True):
+    """
+    Applies a diff to the full table in one pass: updates keep their ids,
+    deleted rows are dropped and inserts are appended, then ids are reset
+    just like a single delete does. With reset_ids=False surviving rows keep
+    their ids and inserts are numbered after the largest one, which keeps
+    validation messages in terms of the grid the user edited.
+    """
+    df = df.copy()
+    for idx, row in updates.items():
+        df.loc[idx, COLUMNS] = [row[col] for col in COLUMNS]
+    df = df.drop(index=deletes)
+    if inserts:
+        first_id = int(df.index.max()) + 1 if len(df) else 0
+        new_rows = pd.DataFrame(inserts, columns=COLUMNS, index=range(first_id, first_id + len(inserts)))
+        df = pd.concat([df, new_rows])
+    return df.reset_index(drop=True) if reset_ids else df
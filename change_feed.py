@@ -0,0 +1,231 @@
+import argparse
+import json
+import os
+import time
+from datetime import datetime
+from appointment_store import COLUMNS, FILE_NAME, file_lock, write_atomic, write_json_atomic
+
+# ------------------------ Configuration ------------------------
+TAIL_BLOCK = 64 * 1024  # Enough to hold the last event when looking up the last sequence number
+POLL_SECONDS = 1.0
+
+
+# ------------------------ Paths ------------------------
+def feed_path(file_name=FILE_NAME):
+    # Next to the CSV whose writes it records, like the schema marker and the rollups
+    return file_name + ".changes.jsonl"
+
+
+def offset_folder(feed_file):
+    """Directory holding one small JSON offset file per consumer of `feed_file`."""
+    return feed_file + ".offsets"
+
+
+# ------------------------ Writing ------------------------
+def last_sequence(f):
+    """
+    Sequence number of the last event in the feed opened as `f` (rb+). A
+    line left half-written by a crash is cut off first, so the next append
+    starts on a clean line.
+    """
+    end = f.seek(0, os.SEEK_END)
+    start = max(end - TAIL_BLOCK, 0)
+    f.seek(start)
+    tail = f.read()
+    if tail and not tail.endswith(b"\n"):
+        cut = tail.rfind(b"\n") + 1
+        f.truncate(start + cut)
+        tail = tail[:cut]
+    lines = tail.splitlines()
+    return json.loads(lines[-1])["seq"] if lines else 0
+
+
+def row_record(row):
+    # Only the stored columns, as text, so events compare equal to what the CSV holds
+    if row is None:
+        return None
+    return {col: "" if row.get(col) is None or row.get(col) != row.get(col) else str(row.get(col)) for col in COLUMNS}
+
+
+def publish_changes(before_version, after_version, changes, file_name=FILE_NAME, feed_file=None):
+    """
+    Appends one event per (old, new) row pair written by one CSV write:
+    "create" when old is None, "delete" when new is None, else "update".
+    Every event of the write carries the data versions read just before and
+    just after the caller's own CSV write, so a consumer whose last seen "after" differs from the next "before"
+    knows data.csv was changed outside the feed and should resync. The
+    events are fsynced before this returns. Returns the last sequence number.
+    """
+    feed_file = feed_file or feed_path(file_name)
+    stamp = datetime.now().isoformat(timespec="seconds")
+    with file_lock(feed_file):
+        with open(feed_file, "a+b") as f:
+            seq = last_sequence(f)
+            lines = []
+            for old, new in changes:
+                seq += 1
+                op = "create" if old is None else "delete" if new is None else "update"
+                event = {"seq": seq, "time": stamp, "op": op, "old": row_record(old), "new": row_record(new),
+                         "before": list(before_version), "after": list(after_version)}
+                lines.append(json.dumps(event, ensure_ascii=False) + "\n")
+            f.seek(0, os.SEEK_END)
+            f.write("".join(lines).encode("utf-8"))
+            f.flush()
+            os.fsync(f.fileno())
+    return seq
+
+
+# ------------------------ Reading ------------------------
+def next_seq(line):
+    # A saved position that no longer falls on the start of a line reads as garbage
+    try:
+        return json.loads(line)["seq"]
+    except (ValueError, KeyError, TypeError):
+        return None
+
+
+def read_events(after=0, position=0, feed_file=None):
+    """
+    Yields (event, end position) for every event with seq > `after`. The
+    scan starts at byte `position` when the event found there is the next
+    one (the usual case for a consumer's saved offset) and from the start of
+    the file otherwise, e.g. after a compaction. A trailing line that is
+    still being written is left for the next read.
+    """
+    feed_file = feed_file or feed_path()
+    if not os.path.exists(feed_file):
+        return
+    with open(feed_file, "rb") as f:
+        f.seek(position)
+        line = f.readline()
+        if not line.endswith(b"\n") or next_seq(line) != after + 1:
+            f.seek(0)
+            line = f.readline()
+        while line.endswith(b"\n"):
+            event = json.loads(line)
+            if event["seq"] > after:
+                yield event, f.tell()
+            line = f.readline()
+
+
+class ChangeConsumer:
+    """
+    A named reader of the change feed with a durable offset. poll() returns
+    the events after the committed offset and commit() moves the offset past
+    everything polled, so an event handled before a crash but not yet
+    committed is delivered again (at-least-once).
+    """
+
+    def __init__(self, name, feed_file=None, offset_dir=None):
+        self.name = name
+        self.feed_file = feed_file or feed_path()
+        self.offset_path = os.path.join(offset_dir or offset_folder(self.feed_file), f"{name}.json")
+        try:
+            with open(self.offset_path, encoding="utf-8") as f:
+                offset = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            offset = {"seq": 0, "position": 0}
+        self.seq = offset["seq"]
+        self.position = offset["position"]
+        self._polled = None
+
+    def poll(self, limit=None):
+        events = []
+        for event, end in read_events(self.seq, self.position, self.feed_file):
+            events.append(event)
+            self._polled = (event["seq"], end)
+            if limit and len(events) >= limit:
+                break
+        return events
+
+    def commit(self):
+        if self._polled is None:
+            return
+        self.seq, self.position = self._polled
+        self._polled = None
+        os.makedirs(os.path.dirname(self.offset_path) or ".", exist_ok=True)
+        write_json_atomic(self.offset_path, {"seq": self.seq, "position": self.position})
+
+    def follow(self, interval=POLL_SECONDS):
+        """Yields events forever, committing each polled batch once the caller has taken all of it."""
+        while True:
+            events = self.poll()
+            yield from events
+            self.commit()
+            if not events:
+                time.sleep(interval)
+
+
+# ------------------------ Compaction ------------------------
+def committed_offsets(offset_dir):
+    """{consumer name: committed seq} for every consumer that has an offset file."""
+    if not os.path.isdir(offset_dir):
+        return {}
+    offsets = {}
+    for name in os.listdir(offset_dir):
+        if name.endswith(".json"):
+            with open(os.path.join(offset_dir, name), encoding="utf-8") as f:
+                offsets[name[:-5]] = json.load(f)["seq"]
+    return offsets
+
+
+def compact(feed_file=None, offset_dir=None):
+    """
+    Drops the events every known consumer has committed. The last event is
+    always kept so sequence numbers continue from it. Returns the number of
+    events removed.
+    """
+    feed_file = feed_file or feed_path()
+    offsets = committed_offsets(offset_dir or offset_folder(feed_file))
+    if not offsets or not os.path.exists(feed_file):
+        return 0
+    upto = min(offsets.values())
+    with file_lock(feed_file):
+        with open(feed_file, "r+b") as f:
+            last = last_sequence(f)
+            upto = min(upto, last - 1)
+            f.seek(0)
+            lines = f.readlines()
+        kept = [line for line in lines if json.loads(line)["seq"] > upto]
+        if len(kept) == len(lines):
+            return 0
+        write_atomic(feed_file, b"".join(kept), fsync=True)
+    return len(lines) - len(kept)
+
+
+# ------------------------ Command Line ------------------------
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Change feed of appointment creates, updates and deletes.")
+    parser.add_argument("--file", default=FILE_NAME, help="appointment CSV (default: data.csv)")
+    parser.add_argument("--feed", help="feed file (default: the CSV name + .changes.jsonl)")
+    commands = parser.add_subparsers(dest="command", required=True)
+    tail = commands.add_parser("tail", help="print events as JSON lines")
+    tail.add_argument("--after", type=int, default=0, help="only events with a higher sequence number")
+    tail.add_argument("--consumer", help="read from and commit this consumer's offset instead of --after")
+    tail.add_argument("--follow", action="store_true", help="keep waiting for new events")
+    commands.add_parser("compact", help="drop events every consumer has committed")
+    args = parser.parse_args(argv)
+    feed_file = args.feed or feed_path(args.file)
+
+    if args.command == "compact":
+        print(f"Removed {compact(feed_file)} events")
+        return
+    if args.consumer:
+        consumer = ChangeConsumer(args.consumer, feed_file)
+        events = consumer.follow() if args.follow else consumer.poll()
+        for event in events:
+            print(json.dumps(event, ensure_ascii=False), flush=True)
+        consumer.commit()
+        return
+    after, position = args.after, 0
+    while True:
+        for event, position in read_events(after, position, feed_file):
+            after = event["seq"]
+            print(json.dumps(event, ensure_ascii=False), flush=True)
+        if not args.follow:
+            break
+        time.sleep(POLL_SECONDS)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,293 @@
+import csv
+import hashlib
+import os
+import re
+import tempfile
+import zipfile
+from datetime import datetime
+from xml.sax.saxutils import escape
+from appointment_store import COLUMNS, FILE_NAME, write_atomic
+
+# ------------------------ Configuration ------------------------
+EXPORT_COLUMNS = ["Month", "Date", "Name", "StartTime", "EndTime", "Phone", "Note"]
+SPOOL_COLUMNS = ["Date", "Name", "StartTime", "EndTime", "Phone", "Note"]
+DATE_FORMATS = ("%Y-%m-%d", "%m/%d/%Y", "%m/%d/%y")
+WIDTH_PADDING = 2
+SHEET_CACHE_DIR = ".excel_sheets"  # Cached sheet XML, one file per distinct month content
+MAX_CACHED_SHEETS = 500
+SHEET_FORMAT = "1"  # Bump when sheet_xml() output changes so cached sheets are rebuilt
+EXCEL_EPOCH = datetime(1899, 12, 30)
+
+
+def parse_date(value):
+    """Parses a stored Date in any of the formats the apps have written, or returns None."""
+    value = (value or "").strip()
+    for date_format in DATE_FORMATS:
+        try:
+            return datetime.strptime(value, date_format)
+        except ValueError:
+            continue
+    return None
+
+
+# ------------------------ Streaming Export ------------------------
+def spool_by_month(source, spool_dir):
+    """
+    First pass over the CSV: copies each row into a spool file for its month,
+    with the date normalised to YYYY-MM-DD. Only one row is held at a time.
+    Returns ({(year, month): spool path}, rows skipped for an unreadable date).
+    """
+    spools = {}
+    handles = []
+    skipped = 0
+    try:
+        with open(source, encoding="utf-8", newline="") as f:
+            for row in csv.DictReader(f, restval=""):
+                date = parse_date(row.get("Date"))
+                if date is None:
+                    skipped += 1
+                    continue
+                month = (date.year, date.month)
+                if month not in spools:
+                    path = os.path.join(spool_dir, f"{month[0]:04d}_{month[1]:02d}.csv")
+                    handle = open(path, "w", encoding="utf-8", newline="")
+                    handles.append(handle)
+                    spools[month] = (path, csv.writer(handle))
+                row["Date"] = date.strftime("%Y-%m-%d")
+                spools[month][1].writerow([row.get(col) or "" for col in SPOOL_COLUMNS])
+    finally:
+        for handle in handles:
+            handle.close()
+    return {month: path for month, (path, _) in spools.items()}, skipped
+
+
+def stream_workbook(file_path, source=FILE_NAME):
+    """
+    Writes every appointment to an Excel workbook with one sheet per year,
+    sorted by Date then StartTime, using xlsxwriter's constant_memory mode.
+    Rows go straight from per-month spool files to the sheet, so memory is
+    bounded by the busiest month rather than the whole history, and column
+    widths are measured while the rows are written. Returns (rows written,
+    rows skipped).
+    """
+    import xlsxwriter
+
+    written = 0
+    with tempfile.TemporaryDirectory(prefix="export_") as spool_dir:
+        spools, skipped = spool_by_month(source, spool_dir)
+
+        workbook = xlsxwriter.Workbook(file_path, {"constant_memory": True})
+        header_format = workbook.add_format({"bold": True, "border": 1})
+        date_format = workbook.add_format({"num_format": "yyyy-mm-dd"})
+        try:
+            for year in sorted({year for year, _ in spools}):
+                worksheet = workbook.add_worksheet(str(year))
+                widths = [len(col) for col in EXPORT_COLUMNS]
+                for col, name in enumerate(EXPORT_COLUMNS):
+                    worksheet.write_string(0, col, name, header_format)
+
+                row_number = 1
+                for month in sorted(month for y, month in spools if y == year):
+                    with open(spools[(year, month)], encoding="utf-8", newline="") as f:
+                        rows = sorted(csv.reader(f), key=lambda r: (r[0], r[2]))
+                    month_name = datetime(year, month, 1).strftime("%B")
+                    for date, *values in rows:
+                        cells = [month_name, date] + values
+                        worksheet.write_string(row_number, 0, month_name)
+                        worksheet.write_datetime(row_number, 1, datetime.strptime(date, "%Y-%m-%d"), date_format)
+                        for col, value in enumerate(values, start=2):
+                            worksheet.write_string(row_number, col, value) # Text keeps phone leading zeros
+                        for col, cell in enumerate(cells):
+                            widths[col] = max(widths[col], len(cell))
+                        row_number += 1
+                    written += len(rows)
+
+                # Auto-fit columns from the widths seen while writing
+                for col, width in enumerate(widths):
+                    worksheet.set_column(col, col, width + WIDTH_PADDING)
+        finally:
+            workbook.close()
+    return written, skipped
+
+
+# ------------------------ Incremental Workbook ------------------------
+# The workbook is assembled from one cached XML part per YYYY_MM sheet. A
+# part is stored under the hash of its month's rows, so a month whose rows
+# did not change since any earlier export (full or filtered) is copied from
+# the cache and only months with new edits are regenerated.
+INVALID_XML_CHARS = re.compile("[\x00-\x08\x0b\x0c\x0e-\x1f]")
+
+CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/xl/workbook.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+    '<Override PartName="/xl/styles.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>'
+    '{sheets}</Types>')
+ROOT_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" Target="xl/workbook.xml"/>'
+    '</Relationships>')
+WORKBOOK = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+    'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+    '<sheets>{sheets}</sheets></workbook>')
+WORKBOOK_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '{sheets}<Relationship Id="rIdStyles" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/styles" Target="styles.xml"/>'
+    '</Relationships>')
+# Cell styles: 0 = default, 1 = yyyy-mm-dd date, 2 = bold header
+STYLES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<styleSheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+    '<numFmts count="1"><numFmt numFmtId="164" formatCode="yyyy\\-mm\\-dd"/></numFmts>'
+    '<fonts count="2"><font><sz val="11"/><name val="Calibri"/></font><font><b/><sz val="11"/><name val="Calibri"/></font></fonts>'
+    '<fills count="2"><fill><patternFill patternType="none"/></fill><fill><patternFill patternType="gray125"/></fill></fills>'
+    '<borders count="1"><border><left/><right/><top/><bottom/><diagonal/></border></borders>'
+    '<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/></cellStyleXfs>'
+    '<cellXfs count="3"><xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/>'
+    '<xf numFmtId="164" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/>'
+    '<xf numFmtId="0" fontId="1" fillId="0" borderId="0" xfId="0" applyFont="1"/></cellXfs>'
+    '<cellStyles count="1"><cellStyle name="Normal" xfId="0" builtinId="0"/></cellStyles>'
+    '</styleSheet>')
+
+
+def column_letter(index):
+    letters = ""
+    index += 1
+    while index:
+        index, remainder = divmod(index - 1, 26)
+        letters = chr(65 + remainder) + letters
+    return letters
+
+
+def text_cell(ref, text, style=0):
+    style_attr = f' s="{style}"' if style else ""
+    text = escape(INVALID_XML_CHARS.sub("", text))
+    return f'<c r="{ref}" t="inlineStr"{style_attr}><is><t xml:space="preserve">{text}</t></is></c>'
+
+
+def sheet_xml(rows):
+    """Worksheet XML for a header plus `rows` (lists of text in COLUMNS order), with inline strings."""
+    letters = [column_letter(col) for col in range(len(COLUMNS))]
+    date_col = COLUMNS.index("Date")
+    widths = [len(col) for col in COLUMNS]
+    body = ['<row r="1">' + "".join(text_cell(f"{letters[col]}1", name, 2) for col, name in enumerate(COLUMNS)) + "</row>"]
+    for number, values in enumerate(rows, start=2):
+        cells = []
+        for col, text in enumerate(values):
+            widths[col] = max(widths[col], len(text))
+            if not text:
+                continue
+            ref = f"{letters[col]}{number}"
+            date = parse_date(text) if col == date_col else None
+            if date is not None:
+                cells.append(f'<c r="{ref}" s="1"><v>{(date - EXCEL_EPOCH).days}</v></c>')
+            else:
+                cells.append(text_cell(ref, text))
+        body.append(f'<row r="{number}">' + "".join(cells) + "</row>")
+
+    cols = "".join(f'<col min="{col + 1}" max="{col + 1}" width="{width + WIDTH_PADDING}" customWidth="1"/>'
+                   for col, width in enumerate(widths))
+    return ('<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+            '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+            f'<cols>{cols}</cols><sheetData>{"".join(body)}</sheetData></worksheet>').encode("utf-8")
+
+
+def month_groups(df):
+    """
+    Yields (YYYY_MM sheet name, content hash, rows) per month, sorted by Date
+    then StartTime. Hashing runs column-wise over the whole table, so an
+    unchanged month costs no per-cell Python work; rows are only turned into
+    text when their sheet has to be built.
+    """
+    import pandas as pd  # Imported on first use so the Tk client starts fast (see 6.py)
+    df = df[COLUMNS].sort_values(["Date", "StartTime"], kind="stable")
+    row_hashes = pd.util.hash_pandas_object(df, index=False).to_numpy()
+    months = df["Date"].astype(str).str[:7].to_numpy()
+    for month, positions in df.groupby(months, sort=True).indices.items():
+        yield month.replace("-", "_"), month_hash(row_hashes[positions]), df.iloc[positions]
+
+
+def month_hash(row_hashes):
+    digest = hashlib.sha1(SHEET_FORMAT.encode("utf-8"))
+    digest.update(row_hashes.tobytes())
+    return digest.hexdigest()
+
+
+def cached_sheet(digest, rows, cache_dir):
+    """Returns (sheet XML, rebuilt?) for one month, generating and caching it only if unseen."""
+    path = os.path.join(cache_dir, digest + ".xml")
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+        os.utime(path)  # Mark as recently used for prune_sheet_cache()
+        return data, False
+    except FileNotFoundError:
+        pass
+    text = rows.astype(object).where(rows.notna(), "").astype(str)  # None and NaN become empty cells
+    data = sheet_xml(text.values.tolist())
+    write_atomic(path, data)  # Report workers and concurrent sessions may build the same sheet at once
+    return data, True
+
+
+def last_used(entry):
+    try:
+        return entry.stat().st_mtime
+    except FileNotFoundError:  # Pruned by another process meanwhile
+        return 0
+
+
+def prune_sheet_cache(cache_dir, keep=MAX_CACHED_SHEETS):
+    """Drops the least recently used cached sheets beyond `keep`."""
+    entries = [entry for entry in os.scandir(cache_dir) if entry.name.endswith(".xml")]
+    if len(entries) <= keep:
+        return
+    entries.sort(key=last_used, reverse=True)
+    for entry in entries[keep:]:
+        try:
+            os.remove(entry.path)
+        except FileNotFoundError:
+            pass
+
+
+def build_workbook(df, target, cache_dir=SHEET_CACHE_DIR, prune=True):
+    """
+    Writes `df` as an .xlsx with one YYYY_MM sheet per month to `target` (a
+    path or a binary file object). Only months whose rows changed since a
+    previous export are regenerated. Returns (sheet count, sheets rebuilt).
+    Pass prune=False when several processes share the cache.
+    """
+    os.makedirs(cache_dir, exist_ok=True)
+    sheets = []
+    rebuilt = 0
+    for name, digest, rows in month_groups(df):
+        data, fresh = cached_sheet(digest, rows, cache_dir)
+        sheets.append((name, data))
+        rebuilt += fresh
+    if not sheets:
+        sheets.append(("Sheet1", sheet_xml([])))
+
+    with zipfile.ZipFile(target, "w", zipfile.ZIP_DEFLATED, compresslevel=1) as archive:
+        archive.writestr("[Content_Types].xml", CONTENT_TYPES.format(sheets="".join(
+            f'<Override PartName="/xl/worksheets/sheet{i}.xml" '
+            'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+            for i in range(1, len(sheets) + 1))))
+        archive.writestr("_rels/.rels", ROOT_RELS)
+        archive.writestr("xl/workbook.xml", WORKBOOK.format(sheets="".join(
+            f'<sheet name="{escape(name)}" sheetId="{i}" r:id="rId{i}"/>'
+            for i, (name, _) in enumerate(sheets, start=1))))
+        archive.writestr("xl/_rels/workbook.xml.rels", WORKBOOK_RELS.format(sheets="".join(
+            f'<Relationship Id="rId{i}" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+            f'Target="worksheets/sheet{i}.xml"/>' for i in range(1, len(sheets) + 1))))
+        archive.writestr("xl/styles.xml", STYLES)
+        for i, (_, data) in enumerate(sheets, start=1):
+            archive.writestr(f"xl/worksheets/sheet{i}.xml", data)
+
+    if prune:
+        prune_sheet_cache(cache_dir)
+    return len(sheets), rebuilt
@@ -0,0 +1,106 @@
+import numpy as np
+import pandas as pd
+from matplotlib import colormaps
+from matplotlib.collections import PolyCollection
+from lanes import assign_lanes
+
+# =============================================================================
+# --- Gantt layout shared by the Tkinter chart and printable sheets ---
+# =============================================================================
+BAR_HEIGHT = 0.6
+MINUTES_PER_DAY = 1440
+MINUTES_PER_CHAR = 11 # Approximate width of one 7pt label character on a 9in, 24h axis
+
+
+def gantt_layout(df_data, selected_date, group_by=None):
+    """
+    Bar geometry for one day's appointments, computed column-wise. Bars that
+    do not overlap share a lane, so a busy day stays compact; with
+    `group_by` (a column name) each group gets its own lanes.
+    """
+    start = pd.to_datetime(selected_date + " " + df_data["StartTime"])
+    end = pd.to_datetime(selected_date + " " + df_data["EndTime"])
+    order = np.argsort(start.to_numpy(), kind="stable")
+    start, end, names = start.iloc[order], end.iloc[order], df_data["Name"].iloc[order]
+
+    left = (start.dt.hour * 60 + start.dt.minute).to_numpy(dtype=float)
+    width = ((end - start).dt.total_seconds() / 60).to_numpy(dtype=float)
+    groups = df_data[group_by].iloc[order].to_numpy() if group_by else None
+    lanes, n_lanes = assign_lanes(left, left + width, groups)
+    times = " (" + start.dt.strftime("%H:%M") + "-" + end.dt.strftime("%H:%M") + ")"
+    return {
+        "left": left,
+        "width": width,
+        "row": lanes.astype(float),
+        "labels": fit_labels(names.astype(str).tolist(), times.tolist(), width),
+        "rows": n_lanes, # Number of chart lanes
+    }
+
+
+def fit_labels(names, times, widths):
+    """Shortens labels to fit inside their bars now that neighbours share a lane."""
+    labels = []
+    for name, time_range, width in zip(names, times, widths):
+        room = int(width // MINUTES_PER_CHAR)
+        label = name + time_range
+        if len(label) > room:
+            label = name if len(name) <= room else name[:max(room - 1, 0)] + "…"
+        labels.append(label)
+    return labels
+
+
+def bar_vertices(layout, height=BAR_HEIGHT):
+    """Rectangle corners for every bar as one (n, 4, 2) array."""
+    x0 = layout["left"]
+    x1 = x0 + layout["width"]
+    y0 = layout["row"] - height / 2
+    y1 = y0 + height
+    return np.stack([np.column_stack(corner) for corner in ((x0, y0), (x0, y1), (x1, y1), (x1, y0))], axis=1)
+
+
+def bar_colors(n):
+    return colormaps["tab10"](np.arange(n) % 10)
+
+
+def figure_height(n_rows):
+    return max(4, n_rows * 0.7)
+
+
+def setup_axes(ax, text_color):
+    """Applies the static styling (24h axis, ticks, grid) and returns the empty bar collection."""
+    ax.set_xlim(0, MINUTES_PER_DAY) # Full 24 hours in minutes
+    ax.set_xticks(range(0, MINUTES_PER_DAY + 1, 60))
+    ax.set_xticks(range(0, MINUTES_PER_DAY + 1, 30), minor=True)
+    ax.set_xticklabels([f"{h:02d}:00" for h in range(25)], fontsize=8)
+    ax.set_yticks([])
+    ax.set_xlabel("Time of Day", fontsize=8, color=text_color)
+    ax.xaxis.grid(True, which='major', linestyle='--', linewidth=0.5, color='gray', alpha=0.7)
+    ax.xaxis.grid(True, which='minor', linestyle=':', linewidth=0.3, color='gray', alpha=0.5)
+    ax.set_facecolor("lightgray")
+
+    collection = PolyCollection([], edgecolor='black', linewidth=0.8)
+    ax.add_collection(collection)
+    return collection
+
+
+def draw_gantt(ax, collection, texts, layout, title, title_color):
+    """
+    Updates the bar collection and label artists in place for a new layout.
+    `texts` is a pool of Text artists that grows as needed and is reused
+    across calls; surplus labels are hidden.
+    """
+    n = len(layout["labels"])
+    collection.set_verts(bar_vertices(layout))
+    collection.set_facecolor(bar_colors(n))
+
+    while len(texts) < n:
+        texts.append(ax.text(0, 0, "", va='center', ha='left', color='black', fontsize=7, weight='bold'))
+    for text, x, y, label in zip(texts, layout["left"] + 2, layout["row"], layout["labels"]):
+        text.set_position((x, y))
+        text.set_text(label)
+        text.set_visible(True)
+    for text in texts[n:]:
+        text.set_visible(False)
+
+    ax.set_ylim(max(layout["rows"], 1) - 0.5, -0.5) # First row at the top
+    ax.set_title(title, fontsize=12, color=title_color, weight='bold')
@@ -0,0 +1,235 @@
+import argparse
+import hashlib
+import threading
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+import pandas as pd
+from appointment_store import COLUMNS, FILE_NAME, data_version, load_appointments
+
+# ------------------------ Configuration ------------------------
+PRODID = "-//Sri Arokaya//Appointment Queue//TH"
+TIMEZONE = "Asia/Bangkok"
+THERAPIST_COLUMN = "Therapist"  # Used for the therapist filter once the store has this column
+DEFAULT_PORT = 8765
+FEED_PATH = "/calendar.ics"
+VTIMEZONE = [
+    "BEGIN:VTIMEZONE", f"TZID:{TIMEZONE}",
+    "BEGIN:STANDARD", "DTSTART:19700101T000000", "TZOFFSETFROM:+0700", "TZOFFSETTO:+0700", "TZNAME:ICT", "END:STANDARD",
+    "END:VTIMEZONE",
+]
+
+
+# ------------------------ iCalendar Text ------------------------
+def escape_text(value):
+    """TEXT value escaping from RFC 5545."""
+    return (str(value).replace("\\", "\\\\").replace(";", "\\;").replace(",", "\\,")
+            .replace("\r\n", "\\n").replace("\n", "\\n"))
+
+
+def fold(line):
+    """Ends a content line with CRLF, folding it every 75 octets without splitting a UTF-8 character."""
+    data = line.encode("utf-8")
+    parts = []
+    start, limit = 0, 75
+    while len(data) - start > limit:
+        end = start + limit
+        while (data[end] & 0xC0) == 0x80:  # Continuation byte: back up to the start of the character
+            end -= 1
+        parts.append(data[start:end].decode("utf-8"))
+        start, limit = end, 74  # Continuation lines begin with a space
+    parts.append(data[start:].decode("utf-8"))
+    return "\r\n ".join(parts) + "\r\n"
+
+
+def vevent(row, stamp):
+    """One appointment (with Start/End timestamps) as VEVENT text; `stamp` is its month's last change (UTC)."""
+    uid = hashlib.sha1(f"{row['Name']}|{row['Date']}|{row['StartTime']}".encode("utf-8")).hexdigest()
+    details = [f"Phone: {row['Phone']}" if row["Phone"] else "", str(row["Note"])]
+    if row.get(THERAPIST_COLUMN):
+        details.insert(0, f"Therapist: {row[THERAPIST_COLUMN]}")
+    lines = [
+        "BEGIN:VEVENT",
+        f"UID:{uid}@sri-arokaya",
+        # When the month last changed, so edits are seen as newer while unchanged months stay byte-identical
+        f"DTSTAMP:{stamp:%Y%m%dT%H%M%S}Z",
+        f"LAST-MODIFIED:{stamp:%Y%m%dT%H%M%S}Z",
+        f"DTSTART;TZID={TIMEZONE}:{row['Start']:%Y%m%dT%H%M%S}",
+        f"DTEND;TZID={TIMEZONE}:{row['End']:%Y%m%dT%H%M%S}",
+        f"SUMMARY:{escape_text(row['Name'])}",
+        f"DESCRIPTION:{escape_text(chr(10).join(d for d in details if d))}",
+        "END:VEVENT",
+    ]
+    return "".join(fold(line) for line in lines)
+
+
+# ------------------------ Feed ------------------------
+class CalendarFeed:
+    """
+    Serves appointments as iCalendar text. Rows are split into month
+    partitions, each with a hash of its content; a partition's VEVENTs are
+    rendered once per content hash and reused until that month changes.
+    Each partition also records when its hash last changed, which becomes
+    DTSTAMP and LAST-MODIFIED of its events. The ETag of a request is derived from the hashes of the months it
+    covers, so an unchanged sync can be answered before any event is built.
+    """
+
+    def __init__(self, file_name=FILE_NAME):
+        self.file_name = file_name
+        self.version = None
+        self.partitions = {}  # "YYYY-MM" -> (content hash, rows, last changed)
+        self._events = {}  # (content hash, last changed) -> [(date, name, therapist, VEVENT text)]
+        self._lock = threading.Lock()
+
+    def refresh(self):
+        """Re-reads the store only if data.csv changed, recomputing every month's hash column-wise."""
+        with self._lock:
+            version = data_version(self.file_name)
+            if version == self.version:
+                return
+            df = load_appointments(self.file_name)
+            columns = COLUMNS + ([THERAPIST_COLUMN] if THERAPIST_COLUMN in df.columns else [])
+            df = df.reindex(columns=columns).fillna("").astype(str)
+            df["Start"] = pd.to_datetime(df["Date"] + " " + df["StartTime"], format="%Y-%m-%d %H:%M", errors="coerce")
+            df["End"] = pd.to_datetime(df["Date"] + " " + df["EndTime"], format="%Y-%m-%d %H:%M", errors="coerce")
+            df = df[df["Start"].notna() & (df["End"] > df["Start"])].sort_values(["Start", "Name"], kind="stable")
+
+            row_hashes = pd.util.hash_pandas_object(df[columns], index=False).to_numpy()
+            months = df["Date"].str[:7].to_numpy()
+            # On the first load every month counts as changed when data.csv was last written,
+            # so a restart without edits renders the same bytes
+            now = (datetime.now(timezone.utc) if self.version is not None
+                   else datetime.fromtimestamp(version[0] / 1e9, timezone.utc))
+            partitions = {}
+            for month, positions in df.groupby(months).indices.items():
+                digest = hashlib.sha1(row_hashes[positions].tobytes()).hexdigest()
+                previous = self.partitions.get(month)
+                stamp = previous[2] if previous is not None and previous[0] == digest else now
+                partitions[month] = (digest, df.iloc[positions], stamp)
+            live = {(digest, stamp) for digest, _, stamp in partitions.values()}
+            self._events = {key: events for key, events in self._events.items() if key in live}
+            self.partitions = partitions
+            self.version = version
+
+    @staticmethod
+    def _months(partitions, start=None, end=None):
+        first = start[:7] if start else None
+        last = end[:7] if end else None
+        return [month for month in sorted(partitions)
+                if (first is None or month >= first) and (last is None or month <= last)]
+
+    def etag(self, start=None, end=None, customer="", therapist=""):
+        """Quoted entity tag for a filtered feed: changes only if a covered month or the filter changes."""
+        self.refresh()
+        partitions = self.partitions  # A snapshot, in case another request refreshes meanwhile
+        digest = hashlib.sha1(repr((start, end, customer.casefold(), therapist.casefold())).encode("utf-8"))
+        for month in self._months(partitions, start, end):
+            digest.update(f"{month}:{partitions[month][0]}:{partitions[month][2]:%Y%m%dT%H%M%S};".encode("ascii"))
+        return f'"{digest.hexdigest()}"'
+
+    def _partition_events(self, digest, rows, stamp):
+        events = self._events.get((digest, stamp))
+        if events is None:
+            events = [(row["Date"], row["Name"].casefold(), row.get(THERAPIST_COLUMN, "").casefold(),
+                       vevent(row, stamp)) for row in rows.to_dict("records")]
+            self._events[(digest, stamp)] = events
+        return events
+
+    def events(self, start=None, end=None, customer="", therapist=""):
+        """
+        Yields VEVENT text for bookings between the YYYY-MM-DD dates `start`
+        and `end` (inclusive, open if None), optionally only for customers
+        whose name contains `customer` or for one therapist.
+        """
+        self.refresh()
+        partitions = self.partitions
+        customer, therapist = customer.casefold(), therapist.casefold()
+        for month in self._months(partitions, start, end):
+            for date, name, booked_with, text in self._partition_events(*partitions[month]):
+                if (start and date < start) or (end and date > end):
+                    continue
+                if customer and customer not in name:
+                    continue
+                if therapist and booked_with != therapist:
+                    continue
+                yield text
+
+    def calendar(self, start=None, end=None, customer="", therapist="", name="Sri Arokaya"):
+        """Yields a whole VCALENDAR as text chunks, one event at a time."""
+        header = ["BEGIN:VCALENDAR", "VERSION:2.0", f"PRODID:{PRODID}", "CALSCALE:GREGORIAN",
+                  f"X-WR-CALNAME:{escape_text(name)}", f"X-WR-TIMEZONE:{TIMEZONE}"] + VTIMEZONE
+        yield "".join(fold(line) for line in header)
+        yield from self.events(start, end, customer, therapist)
+        yield fold("END:VCALENDAR")
+
+
+# ------------------------ HTTP Endpoint ------------------------
+def make_handler(feed, token=None):
+    class FeedHandler(BaseHTTPRequestHandler):
+        """GET /calendar.ics?start=&end=&customer=&therapist=, answering 304 when If-None-Match still matches."""
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            query = {key: values[0] for key, values in parse_qs(url.query).items()}
+            if url.path != FEED_PATH:
+                self.send_error(404)
+                return
+            if token and query.get("token") != token:
+                self.send_error(403)
+                return
+            filters = dict(start=query.get("start") or None, end=query.get("end") or None,
+                           customer=query.get("customer", ""), therapist=query.get("therapist", ""))
+
+            etag = feed.etag(**filters)
+            if etag in [tag.strip() for tag in self.headers.get("If-None-Match", "").split(",")]:
+                self.send_response(304)
+                self.send_header("ETag", etag)
+                self.end_headers()
+                return
+
+            self.send_response(200)
+            self.send_header("Content-Type", "text/calendar; charset=utf-8")
+            self.send_header("ETag", etag)
+            self.send_header("Cache-Control", "no-cache")
+            self.end_headers()
+            # No Content-Length: the body is streamed and the connection closed at the end
+            for chunk in feed.calendar(**filters):
+                self.wfile.write(chunk.encode("utf-8"))
+
+    return FeedHandler
+
+
+def serve(host="127.0.0.1", port=DEFAULT_PORT, file_name=FILE_NAME, token=None):
+    server = ThreadingHTTPServer((host, port), make_handler(CalendarFeed(file_name), token))
+    print(f"Serving http://{host}:{port}{FEED_PATH}" + ("?token=..." if token else ""))
+    server.serve_forever()
+
+
+# ------------------------ Command Line ------------------------
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="iCalendar feed of appointments.")
+    parser.add_argument("--file", default=FILE_NAME, help="appointment CSV (default: data.csv)")
+    commands = parser.add_subparsers(dest="command", required=True)
+    server = commands.add_parser("serve", help="serve the feed over HTTP")
+    server.add_argument("--host", default="127.0.0.1", help="use 0.0.0.0 to let phones on the shop network subscribe")
+    server.add_argument("--port", type=int, default=DEFAULT_PORT)
+    server.add_argument("--token", help="require ?token=... on every request")
+    export = commands.add_parser("export", help="write an .ics file")
+    export.add_argument("output")
+    export.add_argument("--start", help="first date, YYYY-MM-DD")
+    export.add_argument("--end", help="last date, YYYY-MM-DD")
+    export.add_argument("--customer", default="")
+    export.add_argument("--therapist", default="")
+    args = parser.parse_args(argv)
+
+    if args.command == "serve":
+        serve(args.host, args.port, args.file, args.token)
+    else:
+        feed = CalendarFeed(args.file)
+        with open(args.output, "w", encoding="utf-8", newline="") as f:
+            for chunk in feed.calendar(args.start, args.end, args.customer, args.therapist):
+                f.write(chunk)
+
+
+if __name__ == "__main__":
+    main()
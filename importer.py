@@ -0,0 +1,229 @@
+import argparse
+import hashlib
+import json
+import os
+import re
+import pandas as pd
+from appointment_store import COLUMNS, FILE_NAME, data_version, ensure_schema, load_appointments, write_json_atomic
+from change_feed import publish_changes
+from rollups import record_changes
+from validation import find_problems
+
+# ------------------------ Configuration ------------------------
+CHUNK_SIZE = 5000
+DATE_FORMATS = ("%Y-%m-%d", "%m/%d/%Y", "%m/%d/%y")  # Stored form first, then the calendar's forms as in 6.py
+TIME_FORMATS = ("%H:%M", "%H:%M:%S")
+LOCAL_PHONE = r"[1-9]\d{7,8}"  # A Thai number whose leading 0 was lost, e.g. 812345678 from an Excel cell
+REJECT_COLUMNS = ["SourceRow"] + COLUMNS + ["Reason"]
+ROW_PREFIX = re.compile(r"^Rows? [\d, ]+: ")  # Validation ids mean nothing to the user; SourceRow replaces them
+
+
+# ------------------------ Reading ------------------------
+def file_signature(path):
+    """Content hash of the source file, so a checkpoint is only reused for the same file."""
+    digest = hashlib.sha1()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def read_xlsx_chunks(path, chunk_size, skip=0):
+    """
+    Streams every sheet of a workbook with openpyxl's read_only mode. Each
+    sheet's header row (the first row naming Name and Date) maps columns, so
+    exports with an extra Month column or another column order also load.
+    """
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    try:
+        chunk = []
+        seen = 0
+        for sheet in workbook.worksheets:
+            positions = None
+            for values in sheet.iter_rows(values_only=True):
+                if positions is None:
+                    header = [str(value).strip() if value is not None else "" for value in values]
+                    if "Name" in header and "Date" in header:
+                        positions = [header.index(col) if col in header else None for col in COLUMNS]
+                    continue
+                if all(value is None for value in values):
+                    continue
+                seen += 1
+                if seen <= skip:
+                    continue
+                chunk.append([values[i] if i is not None and i < len(values) else None for i in positions])
+                if len(chunk) == chunk_size:
+                    yield pd.DataFrame(chunk, columns=COLUMNS)
+                    chunk = []
+        if chunk:
+            yield pd.DataFrame(chunk, columns=COLUMNS)
+    finally:
+        workbook.close()
+
+
+def read_csv_chunks(path, chunk_size, skip=0):
+    reader = pd.read_csv(path, dtype=str, keep_default_na=False, chunksize=chunk_size,
+                         skiprows=range(1, skip + 1))
+    for chunk in reader:
+        yield chunk.reindex(columns=COLUMNS, fill_value="")
+
+
+def read_chunks(path, chunk_size=CHUNK_SIZE, skip=0):
+    """Yields DataFrames of raw source rows in COLUMNS order, after skipping `skip` data rows."""
+    if os.path.splitext(path)[1].lower() in (".xlsx", ".xlsm"):
+        return read_xlsx_chunks(path, chunk_size, skip)
+    return read_csv_chunks(path, chunk_size, skip)
+
+
+# ------------------------ Normalizing ------------------------
+def as_text(values):
+    # Empty cells become "", and Excel numbers such as 812345678.0 lose their ".0"
+    text = values.astype(object).where(values.notna(), "").astype(str).str.strip()
+    return text.str.replace(r"^(\d+)\.0$", r"\1", regex=True)
+
+
+def parse_formats(text, formats):
+    parsed = pd.Series(pd.NaT, index=text.index, dtype="datetime64[ns]")
+    for fmt in formats:
+        parsed = parsed.fillna(pd.to_datetime(text, format=fmt, errors="coerce"))
+    return parsed
+
+
+def normalize_chunk(chunk):
+    """
+    Brings a chunk into the stored format, column by column: dates to
+    YYYY-MM-DD from either calendar form, times to HH:MM and phones as text
+    with their leading zero. Values that cannot be read are kept as they
+    are so validation reports them.
+    """
+    df = pd.DataFrame({col: as_text(chunk[col]) for col in COLUMNS}, index=chunk.index)
+
+    date_text = df["Date"].str.split(" ").str[0]  # Excel dates arrive as "2025-07-03 00:00:00"
+    df["Date"] = parse_formats(date_text, DATE_FORMATS).dt.strftime("%Y-%m-%d").fillna(df["Date"])
+    for col in ("StartTime", "EndTime"):
+        df[col] = parse_formats(df[col], TIME_FORMATS).dt.strftime("%H:%M").fillna(df[col])
+
+    phone = df["Phone"].str.replace(r"[\s\-()]", "", regex=True)
+    phone = phone.mask(phone.str.fullmatch(LOCAL_PHONE), "0" + phone)
+    df["Phone"] = phone
+    df["Note"] = df["Note"].str.replace("\n", " ")
+    return df
+
+
+# ------------------------ Validation ------------------------
+def split_valid(batch, existing):
+    """
+    Validates a normalized batch against itself and the stored rows on the
+    same dates in one vectorized pass. A new row involved in a problem is
+    rejected, except that when a problem only involves new rows (e.g. two
+    overlapping imports) the first of them is kept. Returns (valid rows,
+    {batch row id: reason}).
+    """
+    dates = batch["Date"].unique()
+    combined = pd.concat([existing[existing["Date"].isin(dates)], batch])
+    new_ids = set(batch.index)
+    rejected = {}
+    for ids, message in find_problems(combined, rows=new_ids):
+        involved = sorted(i for i in ids if i in new_ids)
+        if len(involved) == len(ids) and len(involved) > 1:
+            involved = involved[1:]
+        for i in involved:
+            rejected.setdefault(i, ROW_PREFIX.sub("", message))
+    return batch.drop(index=list(rejected)), rejected
+
+
+# ------------------------ Checkpoints ------------------------
+def checkpoint_path(source):
+    return source + ".import.json"
+
+
+def load_checkpoint(source, signature):
+    try:
+        with open(checkpoint_path(source), encoding="utf-8") as f:
+            checkpoint = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+    return checkpoint if checkpoint.get("signature") == signature else None
+
+
+def save_checkpoint(source, checkpoint):
+    write_json_atomic(checkpoint_path(source), checkpoint)
+
+
+# ------------------------ Import ------------------------
+def import_file(source, file_name=FILE_NAME, chunk_size=CHUNK_SIZE, restart=False, progress=None):
+    """
+    Streams `source` (.xlsx or .csv) into the appointment CSV chunk by
+    chunk: normalize, validate, append the valid rows and update the
+    rollups, then record a checkpoint. If the import is interrupted, running
+    it again on the same file continues after the last committed chunk.
+    Rejected rows go to `<source>.rejected.csv` with the reason.
+    `progress(checkpoint)` is called after every chunk. Returns the final
+    checkpoint dict (rows read, imported, rejected).
+    """
+    signature = file_signature(source)
+    checkpoint = None if restart else load_checkpoint(source, signature)
+    if checkpoint is None:
+        checkpoint = {"signature": signature, "rows_read": 0, "imported": 0, "rejected": 0, "done": False}
+    if checkpoint["done"]:
+        return checkpoint
+
+    reject_file = source + ".rejected.csv"
+    if checkpoint["rows_read"] == 0 and os.path.exists(reject_file):
+        os.remove(reject_file)
+    ensure_schema(file_name)
+    existing = load_appointments(file_name).reindex(columns=COLUMNS).fillna("").astype(str)
+
+    for chunk in read_chunks(source, chunk_size, skip=checkpoint["rows_read"]):
+        first_row = checkpoint["rows_read"]
+        # Ids after the stored rows keep batch rows distinct from existing ones during validation
+        chunk.index = range(len(existing), len(existing) + len(chunk))
+        batch = normalize_chunk(chunk)
+        valid, rejected = split_valid(batch, existing)
+
+        if len(valid):
+            before = data_version(file_name)
+            valid.to_csv(file_name, mode="a", header=False, index=False)
+            after = data_version(file_name)
+            changes = [(None, row) for row in valid.to_dict("records")]
+            record_changes(before, after, changes, file_name=file_name)
+            publish_changes(before, after, changes, file_name=file_name)
+            existing = pd.concat([existing, valid], ignore_index=True)
+        if rejected:
+            rows = batch.loc[sorted(rejected)].copy()
+            rows.insert(0, "SourceRow", [first_row + 1 + i - chunk.index[0] for i in rows.index]) # 1-based data row
+            rows["Reason"] = [rejected[i] for i in rows.index]
+            rows[REJECT_COLUMNS].to_csv(reject_file, mode="a", header=not os.path.exists(reject_file), index=False)
+
+        checkpoint["rows_read"] += len(chunk)
+        checkpoint["imported"] += len(valid)
+        checkpoint["rejected"] += len(rejected)
+        save_checkpoint(source, checkpoint)
+        if progress is not None:
+            progress(checkpoint)
+
+    checkpoint["done"] = True
+    save_checkpoint(source, checkpoint)
+    return checkpoint
+
+
+# ------------------------ Command Line ------------------------
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Import appointments from an .xlsx or .csv file.")
+    parser.add_argument("source", help="workbook or CSV to import")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE, help=f"rows per commit (default: {CHUNK_SIZE})")
+    parser.add_argument("--restart", action="store_true", help="ignore an earlier checkpoint for this file")
+    parser.add_argument("--file", default=FILE_NAME, help="appointment CSV to import into (default: data.csv)")
+    args = parser.parse_args(argv)
+
+    result = import_file(args.source, args.file, args.chunk_size, args.restart,
+                         progress=lambda c: print(f"{c['rows_read']} rows read, {c['imported']} imported, "
+                                                  f"{c['rejected']} rejected", flush=True))
+    print(f"Done: {result['imported']} imported, {result['rejected']} rejected"
+          + (f" (see {args.source}.rejected.csv)" if result["rejected"] else ""))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,36 @@
+import heapq
+import numpy as np
+
+
+# ------------------------ Lane Packing ------------------------
+def assign_lanes(starts, ends, groups=None):
+    """
+    Greedy interval partitioning in O(n log n): appointments are taken in
+    start order and placed on the lane that frees up earliest, opening a new
+    lane only when every lane is still busy. This uses the fewest lanes
+    possible. With `groups` (e.g. a therapist per appointment) each group
+    gets its own block of lanes. Returns (lane per appointment, lane count).
+    """
+    starts = np.asarray(starts)
+    ends = np.asarray(ends)
+    lanes = np.zeros(len(starts), dtype=int)
+    if groups is None:
+        groups = np.zeros(len(starts), dtype=int)
+    groups = np.asarray(groups)
+
+    offset = 0
+    for group in dict.fromkeys(groups.tolist()):
+        members = np.flatnonzero(groups == group)
+        members = members[np.argsort(starts[members], kind="stable")]
+        free_at = []  # heap of (end of last booking, lane)
+        used = 0
+        for i in members:
+            if free_at and free_at[0][0] <= starts[i]:
+                _, lane = heapq.heappop(free_at)
+            else:
+                lane = used
+                used += 1
+            lanes[i] = offset + lane
+            heapq.heappush(free_at, (ends[i], lane))
+        offset += used
+    return lanes, offset
@@ -0,0 +1,145 @@
+import heapq
+import math
+import re
+import threading
+from bisect import bisect_left
+from collections import Counter, defaultdict
+
+# Thai word segmentation is optional; without it notes are indexed as character bigrams
+try:
+    from pythainlp.tokenize import word_tokenize
+except ImportError:
+    word_tokenize = None
+
+# ------------------------ Tokenizer ------------------------
+THAI_RUN = re.compile(r"[฀-๿]+")
+TOKEN = re.compile(r"[฀-๿]+|\w+")
+
+
+def bigrams(text):
+    """Overlapping two-character grams; single characters are kept as-is."""
+    return [text[i:i + 2] for i in range(len(text) - 1)] or [text]
+
+
+def tokenize(text):
+    """Splits a note into index terms: Thai runs are segmented (or bigrammed), other words lowercased."""
+    if not isinstance(text, str):
+        return []
+    terms = []
+    for chunk in TOKEN.findall(text.lower()):
+        if not THAI_RUN.fullmatch(chunk):
+            terms.append(chunk)
+        elif word_tokenize is not None:
+            terms.extend(t for t in word_tokenize(chunk, keep_whitespace=False) if t.strip())
+        else:
+            terms.extend(bigrams(chunk))
+    return terms
+
+
+# ------------------------ Inverted Index ------------------------
+class NoteIndex:
+    """
+    Inverted index over the Note column, looked up by CSV row id.
+    Results must contain every query term and are ranked with BM25.
+    One instance is shared by every Streamlit session, so all reads and
+    writes hold a lock.
+
+    Postings are keyed by an internal key that never changes, and `keys`
+    maps row ids (positions) to those keys in ascending order. Deleting a
+    row therefore drops one list entry instead of renumbering every later
+    posting, and a key turns back into its row id with one bisect.
+    """
+
+    K1 = 1.2
+    B = 0.75
+
+    def __init__(self):
+        self.version = None
+        self.postings = defaultdict(dict)  # term -> {key: term frequency}
+        self.doc_terms = {}                # key -> Counter of its terms
+        self.keys = []                     # row id -> key, ascending
+        self.total_length = 0
+        self._next_key = 0
+        self._lock = threading.Lock()
+
+    def rebuild(self, notes, version=None):
+        """Re-indexes every note from a Series indexed by row id."""
+        # Built off to the side and swapped in, so searches meanwhile see the old index
+        fresh = NoteIndex()
+        for doc_id, note in notes.items():
+            fresh._add(doc_id, note)
+        with self._lock:
+            self.postings, self.doc_terms, self.total_length = fresh.postings, fresh.doc_terms, fresh.total_length
+            self.keys, self._next_key = fresh.keys, fresh._next_key
+            self.version = version
+
+    def add(self, doc_id, note):
+        """Indexes the row appended at `doc_id`, or replaces the note of an existing row."""
+        with self._lock:
+            self._add(doc_id, note)
+
+    def _add(self, doc_id, note):
+        if doc_id < len(self.keys):
+            key = self.keys[doc_id]
+            self._remove(key)
+        else:
+            key = self._next_key
+            self._next_key += 1
+            self.keys.append(key)
+        terms = Counter(tokenize(note))
+        self.doc_terms[key] = terms
+        self.total_length += sum(terms.values())
+        for term, tf in terms.items():
+            self.postings[term][key] = tf
+
+    def _remove(self, key):
+        terms = self.doc_terms.pop(key, Counter())
+        self.total_length -= sum(terms.values())
+        for term in terms:
+            del self.postings[term][key]
+            if not self.postings[term]:
+                del self.postings[term]
+
+    def update(self, doc_id, note):
+        with self._lock:
+            self._add(doc_id, note)
+
+    def delete(self, doc_id):
+        """Removes a row; later rows move down one row id, as deleting from the CSV does."""
+        with self._lock:
+            if doc_id < len(self.keys):
+                self._remove(self.keys.pop(doc_id))
+
+    def search(self, query, limit=50):
+        """Returns up to `limit` (row id, score) pairs, best match first."""
+        terms = set(tokenize(query))
+        with self._lock:
+            return self._search(terms, limit)
+
+    def _search(self, terms, limit):
+        if not terms or any(term not in self.postings for term in terms):
+            return []
+        # Intersect starting from the rarest term so the candidate set stays small
+        ordered = sorted(terms, key=lambda term: len(self.postings[term]))
+        candidates = set(self.postings[ordered[0]])
+        for term in ordered[1:]:
+            candidates.intersection_update(self.postings[term])
+            if not candidates:
+                return []
+
+        n_docs = len(self.doc_terms)
+        avg_length = self.total_length / n_docs if n_docs else 0
+        idf = {term: math.log(1 + (n_docs - len(self.postings[term]) + 0.5) / (len(self.postings[term]) + 0.5))
+               for term in terms}
+
+        def score(key):
+            length = sum(self.doc_terms[key].values())
+            norm = self.K1 * (1 - self.B + self.B * length / avg_length) if avg_length else self.K1
+            total = 0.0
+            for term in terms:
+                tf = self.postings[term][key]
+                total += idf[term] * tf * (self.K1 + 1) / (tf + norm)
+            return total
+
+        hits = heapq.nlargest(limit, ((key, score(key)) for key in candidates), key=lambda hit: hit[1])
+        return [(bisect_left(self.keys, key), value) for key, value in hits]
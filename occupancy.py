@@ -0,0 +1,39 @@
+import numpy as np
+import pandas as pd
+
+MINUTES_PER_DAY = 1440
+
+
+# ------------------------ Occupancy Binning ------------------------
+def occupancy_matrix(df, first_day, last_day, bin_minutes=60):
+    """
+    Booked minutes per (day, time bin) for [first_day, last_day], as a
+    days x bins array. Each appointment's overlap with every bin is computed
+    with one broadcast instead of a loop over appointments.
+    """
+    days = pd.date_range(first_day, last_day)
+    n_bins = MINUTES_PER_DAY // bin_minutes
+    matrix = np.zeros((len(days), n_bins))
+    if df.empty:
+        return days, matrix
+
+    date = pd.to_datetime(df["Date"], format="%Y-%m-%d", errors="coerce")
+    start = pd.to_timedelta(df["StartTime"].astype(str) + ":00", errors="coerce")
+    end = pd.to_timedelta(df["EndTime"].astype(str) + ":00", errors="coerce")
+    day_index = ((date - days[0]).dt.days).to_numpy()
+    valid = (date.notna() & start.notna() & end.notna()).to_numpy() & (day_index >= 0) & (day_index < len(days))
+
+    start_min = (start.dt.total_seconds().to_numpy()[valid] / 60)[:, None]
+    end_min = np.minimum(end.dt.total_seconds().to_numpy()[valid] / 60, MINUTES_PER_DAY)[:, None]
+    bin_start = np.arange(n_bins) * bin_minutes
+    overlap = np.clip(np.minimum(end_min, bin_start + bin_minutes) - np.maximum(start_min, bin_start), 0, None)
+    np.add.at(matrix, day_index[valid].astype(int), overlap)
+    return days, matrix
+
+
+def busy_hours(matrix):
+    """(first, last) bin indexes that have any booking, to trim empty night hours from the view."""
+    used = np.flatnonzero(matrix.sum(axis=0))
+    if not len(used):
+        return 0, matrix.shape[1] - 1
+    return int(used[0]), int(used[-1])
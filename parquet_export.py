@@ -0,0 +1,169 @@
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import pandas as pd
+from appointment_store import COLUMNS, FILE_NAME, load_appointments, temp_name, write_json_atomic
+
+# ------------------------ Configuration ------------------------
+PARQUET_DIR = "analytics"
+STATE_FILE = "_export_state.json"  # Leading underscore: Parquet readers skip it when loading the directory
+PART_FILE = "part-0.parquet"
+COMPRESSIONS = ("zstd", "snappy")
+DEFAULT_COMPRESSION = "zstd"
+EXPORT_FORMAT = "1"  # Bump when the schema changes so every partition is rewritten
+
+
+# ------------------------ Typed Table ------------------------
+def arrow_schema():
+    import pyarrow as pa
+    return pa.schema([
+        ("Name", pa.string()),
+        ("Date", pa.date32()),
+        ("StartTime", pa.time32("s")),
+        ("EndTime", pa.time32("s")),
+        ("DurationMinutes", pa.int32()),
+        ("Phone", pa.string()),  # Text, so leading zeros survive
+        ("Note", pa.string()),
+    ])
+
+
+def seconds_of_day(dates, times):
+    parsed = pd.to_datetime(dates + " " + times, format="%Y-%m-%d %H:%M", errors="coerce")
+    return ((parsed - parsed.dt.normalize()).dt.total_seconds()).astype("Int32"), parsed
+
+
+def month_table(rows):
+    """One month of text rows as an Arrow table of arrow_schema() types; unreadable times become nulls."""
+    import pyarrow as pa
+    start, start_at = seconds_of_day(rows["Date"], rows["StartTime"])
+    end, end_at = seconds_of_day(rows["Date"], rows["EndTime"])
+    duration = ((end_at - start_at).dt.total_seconds() // 60).astype("Int32")
+    return pa.table({
+        "Name": pa.array(rows["Name"], pa.string()),
+        "Date": pa.array(pd.to_datetime(rows["Date"], format="%Y-%m-%d").dt.date, pa.date32()),
+        "StartTime": pa.array(start, pa.int32(), from_pandas=True).cast(pa.time32("s")),
+        "EndTime": pa.array(end, pa.int32(), from_pandas=True).cast(pa.time32("s")),
+        "DurationMinutes": pa.array(duration, pa.int32(), from_pandas=True),
+        "Phone": pa.array(rows["Phone"], pa.string()),
+        "Note": pa.array(rows["Note"], pa.string()),
+    }, schema=arrow_schema())
+
+
+# ------------------------ Partitions ------------------------
+def month_partitions(df):
+    """
+    Returns ({"YYYY-MM": rows}, skipped count). Rows are sorted by Date and
+    StartTime; rows whose Date is not YYYY-MM-DD cannot be partitioned and
+    are skipped.
+    """
+    df = df.reindex(columns=COLUMNS).fillna("").astype(str)
+    valid = pd.to_datetime(df["Date"], format="%Y-%m-%d", errors="coerce").notna()
+    df = df[valid].sort_values(["Date", "StartTime"], kind="stable")
+    return dict(tuple(df.groupby(df["Date"].str[:7], sort=True))), int((~valid).sum())
+
+
+def partition_hash(rows, compression):
+    digest = hashlib.sha1(f"{EXPORT_FORMAT}|{compression}".encode("utf-8"))
+    digest.update(pd.util.hash_pandas_object(rows, index=False).to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+def partition_dir(out_dir, month):
+    # Hive-style directories, so pandas/pyarrow/DuckDB read year and month back as columns
+    return os.path.join(out_dir, f"year={month[:4]}", f"month={month[5:7]}")
+
+
+def load_state(out_dir):
+    try:
+        with open(os.path.join(out_dir, STATE_FILE), encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+def save_state(out_dir, state):
+    write_json_atomic(os.path.join(out_dir, STATE_FILE), state)
+
+
+def write_partition(out_dir, month, rows, compression):
+    import pyarrow.parquet as pq
+    folder = partition_dir(out_dir, month)
+    os.makedirs(folder, exist_ok=True)
+    # A dot-prefixed temp name is ignored by readers until it replaces the old partition
+    temp_path = temp_name(os.path.join(folder, "." + PART_FILE))
+    pq.write_table(month_table(rows), temp_path, compression=compression)
+    os.replace(temp_path, os.path.join(folder, PART_FILE))
+
+
+def exported_months(out_dir):
+    """The "YYYY-MM" months that have a partition directory in `out_dir`."""
+    months = set()
+    for year in os.listdir(out_dir):
+        if year.startswith("year=") and os.path.isdir(os.path.join(out_dir, year)):
+            months.update(f"{year[5:]}-{month[6:]}" for month in os.listdir(os.path.join(out_dir, year))
+                          if month.startswith("month="))
+    return months
+
+
+def remove_partition(out_dir, month):
+    folder = partition_dir(out_dir, month)
+    shutil.rmtree(folder, ignore_errors=True)
+    year_dir = os.path.dirname(folder)
+    if os.path.isdir(year_dir) and not os.listdir(year_dir):
+        os.rmdir(year_dir)
+
+
+# ------------------------ Export ------------------------
+def export_parquet(out_dir=PARQUET_DIR, df=None, compression=DEFAULT_COMPRESSION, incremental=True):
+    """
+    Writes the appointments as Parquet partitioned by year and month. In
+    incremental mode each month's content hash is compared with the last
+    export's and only new or changed months are rewritten; months that no
+    longer have rows are removed. Returns (written, unchanged, removed,
+    skipped rows).
+    """
+    if compression not in COMPRESSIONS:
+        raise ValueError(f"Unknown compression '{compression}', expected one of {', '.join(COMPRESSIONS)}")
+    if df is None:
+        df = load_appointments()
+    os.makedirs(out_dir, exist_ok=True)
+    partitions, skipped = month_partitions(df)
+    previous = load_state(out_dir) if incremental else {}
+
+    state = {}
+    written = unchanged = 0
+    for month, rows in partitions.items():
+        digest = partition_hash(rows, compression)
+        state[month] = digest
+        if previous.get(month) == digest and os.path.exists(os.path.join(partition_dir(out_dir, month), PART_FILE)):
+            unchanged += 1
+            continue
+        write_partition(out_dir, month, rows, compression)
+        written += 1
+
+    stale = exported_months(out_dir) - set(state)
+    for month in stale:
+        remove_partition(out_dir, month)
+    save_state(out_dir, state)
+    return written, unchanged, len(stale), skipped
+
+
+# ------------------------ Command Line ------------------------
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export appointments as date-partitioned Parquet for analysis.")
+    parser.add_argument("--out", default=PARQUET_DIR, help="output directory (default: analytics)")
+    parser.add_argument("--compression", choices=COMPRESSIONS, default=DEFAULT_COMPRESSION)
+    parser.add_argument("--full", action="store_true", help="rewrite every partition instead of only changed months")
+    parser.add_argument("--file", default=FILE_NAME, help="appointment CSV (default: data.csv)")
+    args = parser.parse_args(argv)
+
+    written, unchanged, removed, skipped = export_parquet(args.out, load_appointments(args.file), args.compression,
+                                                          incremental=not args.full)
+    print(f"{written} partitions written, {unchanged} unchanged, {removed} removed"
+          + (f", {skipped} rows with an invalid date skipped" if skipped else ""))
+
+
+if __name__ == "__main__":
+    main()
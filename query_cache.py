@@ -0,0 +1,77 @@
+import threading
+from collections import OrderedDict
+from datetime import date, datetime
+
+ALL_PARTITIONS = "*"  # Tag for results that depend on every month
+
+
+# ------------------------ Partitions ------------------------
+def partition_of(value):
+    """Month partition ("YYYY-MM") of a date, datetime or "YYYY-MM-DD" string."""
+    if isinstance(value, (date, datetime)):
+        return value.strftime("%Y-%m")
+    return str(value)[:7]
+
+
+def normalize(value):
+    """Canonical form of a query parameter so equivalent queries share a cache entry."""
+    if isinstance(value, str):
+        return " ".join(value.split()).casefold()
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    return value
+
+
+# ------------------------ LRU Cache ------------------------
+class QueryCache:
+    """
+    Bounded LRU cache of query results. Each entry is tagged with the month
+    partitions it reads, and a write only evicts entries tagged with the
+    months it touched (or tagged with ALL_PARTITIONS).
+    """
+
+    def __init__(self, max_entries=256):
+        self.max_entries = max_entries
+        self.version = None
+        self._entries = OrderedDict()  # key -> (result, partitions)
+        self._lock = threading.Lock()
+        self._generation = 0  # Bumped by every clear/invalidate
+
+    def key(self, name, params):
+        return (name, tuple(sorted((k, normalize(v)) for k, v in params.items())))
+
+    def get_or_compute(self, name, params, partitions, compute):
+        """Returns the cached result for (name, params), computing and storing it on a miss."""
+        key = self.key(name, params)
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return self._entries[key][0]
+            generation = self._generation
+        result = compute()
+        tags = frozenset([ALL_PARTITIONS] if partitions is None else map(partition_of, partitions))
+        with self._lock:
+            # A write evicted entries while this was computing: the result may be stale, so don't keep it
+            if self._generation != generation:
+                return result
+            self._entries[key] = (result, tags)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return result
+
+    def invalidate(self, partitions):
+        """Evicts entries that read any of the given dates' month partitions."""
+        touched = {partition_of(p) for p in partitions} | {ALL_PARTITIONS}
+        with self._lock:
+            self._generation += 1
+            for key in [k for k, (_, tags) in self._entries.items() if tags & touched]:
+                del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
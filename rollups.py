@@ -0,0 +1,176 @@
+import argparse
+import calendar
+import json
+import os
+from datetime import datetime
+import pandas as pd
+from appointment_store import FILE_NAME, data_version, file_lock, load_appointments, write_json_atomic
+
+# ------------------------ Configuration ------------------------
+OPEN_MINUTES_PER_DAY = 12 * 60  # Shop capacity used for utilization (09:00-21:00)
+LEVELS = ("daily", "weekly", "monthly")
+
+
+# ------------------------ Period Keys ------------------------
+def period_keys(date):
+    """Returns the daily, weekly (ISO) and monthly keys for a date."""
+    year, week, _ = date.isocalendar()
+    return {
+        "daily": date.strftime("%Y-%m-%d"),
+        "weekly": f"{year}-W{week:02d}",
+        "monthly": date.strftime("%Y-%m"),
+    }
+
+
+def period_days(level, key):
+    """Number of opening days in a period, for utilization."""
+    if level == "daily":
+        return 1
+    if level == "weekly":
+        return 7
+    year, month = map(int, key.split("-"))
+    return calendar.monthrange(year, month)[1]
+
+
+def parse_booking(row):
+    """Returns (booked minutes, start datetime) for one appointment, or None if its fields are unusable."""
+    try:
+        start = datetime.strptime(f"{row['Date']} {row['StartTime']}", "%Y-%m-%d %H:%M")
+        end = datetime.strptime(f"{row['Date']} {row['EndTime']}", "%Y-%m-%d %H:%M")
+    except (TypeError, ValueError):
+        return None
+    return max((end - start).total_seconds() / 60, 0), start
+
+
+# ------------------------ Rollup Tables ------------------------
+def empty_rollups():
+    return {"version": None, **{level: {} for level in LEVELS}}
+
+
+def apply_change(rollups, old=None, new=None):
+    """Removes `old` and adds `new` (appointment row dicts) to every rollup level."""
+    for row, sign in ((old, -1), (new, 1)):
+        parsed = parse_booking(row) if row is not None else None
+        if parsed is None:
+            continue
+        minutes, start = parsed
+        for level, key in period_keys(start).items():
+            bucket = rollups[level].setdefault(key, {"count": 0, "minutes": 0.0})
+            bucket["count"] += sign
+            bucket["minutes"] += sign * minutes
+            if bucket["count"] <= 0:
+                del rollups[level][key]
+
+
+def rebuild_rollups(df):
+    """Recomputes every rollup level from the full appointment table."""
+    rollups = empty_rollups()
+    start = pd.to_datetime(df["Date"].astype(str) + " " + df["StartTime"].astype(str), format="%Y-%m-%d %H:%M", errors="coerce")
+    end = pd.to_datetime(df["Date"].astype(str) + " " + df["EndTime"].astype(str), format="%Y-%m-%d %H:%M", errors="coerce")
+    valid = start.notna() & end.notna()
+    start = start[valid]
+    minutes = ((end[valid] - start).dt.total_seconds() / 60).clip(lower=0)
+    iso = start.dt.isocalendar()
+    keys = {
+        "daily": start.dt.strftime("%Y-%m-%d"),
+        "weekly": iso["year"].astype(str) + "-W" + iso["week"].astype(str).str.zfill(2),
+        "monthly": start.dt.strftime("%Y-%m"),
+    }
+    for level, key in keys.items():
+        grouped = minutes.groupby(key).agg(["count", "sum"])
+        rollups[level] = {k: {"count": int(r["count"]), "minutes": float(r["sum"])} for k, r in grouped.iterrows()}
+    return rollups
+
+
+def rollup_path(file_name=FILE_NAME):
+    # Next to the CSV it summarizes, like the schema marker, so --file stores get their own rollups
+    return file_name + ".rollups.json"
+
+
+def load_rollups(path):
+    if not os.path.exists(path):
+        return empty_rollups()
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_rollups(rollups, path):
+    write_json_atomic(path, rollups)
+
+
+def record_change(before_version, after_version, old=None, new=None, file_name=FILE_NAME, path=None):
+    """
+    Applies one write to the stored rollups. `before_version` and
+    `after_version` are the data versions read just before and just after
+    the caller's own CSV write; if the rollups were not in sync with
+    `before_version` they are rebuilt instead.
+    """
+    return record_changes(before_version, after_version, [(old, new)], file_name, path)
+
+
+def record_changes(before_version, after_version, changes, file_name=FILE_NAME, path=None):
+    """Applies a batch of (old, new) row pairs written as one CSV write."""
+    path = path or rollup_path(file_name)
+    # Tk, Streamlit sessions and the importer all update the same file
+    with file_lock(path):
+        rollups = load_rollups(path)
+        if rollups["version"] == list(before_version):
+            for old, new in changes:
+                apply_change(rollups, old, new)
+            rollups["version"] = list(after_version)
+        else:
+            rollups = rebuild(file_name)
+        save_rollups(rollups, path)
+    return rollups
+
+
+def rebuild(file_name=FILE_NAME):
+    # Stamped with the version read before the CSV, so a write made meanwhile triggers another rebuild
+    version = list(data_version(file_name))
+    rollups = rebuild_rollups(load_appointments(file_name))
+    rollups["version"] = version
+    return rollups
+
+
+def current_rollups(file_name=FILE_NAME, path=None):
+    """Returns rollups matching the CSV, rebuilding them only if they are missing or stale."""
+    path = path or rollup_path(file_name)
+    rollups = load_rollups(path)
+    if rollups["version"] != list(data_version(file_name)):
+        with file_lock(path):
+            rollups = rebuild(file_name)
+            save_rollups(rollups, path)
+    return rollups
+
+
+def rollup_frame(rollups, level):
+    """One rollup level as a DataFrame with counts, booked hours and utilization."""
+    records = [
+        {
+            "Period": key,
+            "Appointments": bucket["count"],
+            "BookedHours": round(bucket["minutes"] / 60, 2),
+            "Utilization": bucket["minutes"] / (OPEN_MINUTES_PER_DAY * period_days(level, key)),
+        }
+        for key, bucket in sorted(rollups[level].items())
+    ]
+    return pd.DataFrame(records, columns=["Period", "Appointments", "BookedHours", "Utilization"])
+
+
+# ------------------------ Command Line ------------------------
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Daily, weekly and monthly appointment rollups.")
+    parser.add_argument("command", choices=["rebuild"])
+    parser.add_argument("--file", default=FILE_NAME, help="appointment CSV (default: data.csv)")
+    args = parser.parse_args(argv)
+
+    path = rollup_path(args.file)
+    with file_lock(path):
+        rollups = rebuild(args.file)
+        save_rollups(rollups, path)
+    print(f"Rebuilt {len(rollups['daily'])} daily, {len(rollups['weekly'])} weekly, "
+          f"{len(rollups['monthly'])} monthly rollups into {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,174 @@
+import argparse
+import hashlib
+import multiprocessing
+import os
+import shutil
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import pandas as pd
+from appointment_store import COLUMNS, FILE_NAME, load_appointments, temp_name
+
+# ------------------------ Configuration ------------------------
+SHEET_CACHE_DIR = ".schedule_sheets"  # Rendered pages, one file per day content and format
+FORMATS = ("pdf", "png")
+PAGE_SIZE = (11.69, 8.27)  # A4 landscape, inches
+PNG_DPI = 150
+TITLE_COLOR = "#2C3E50"
+TEXT_COLOR = "#2C3E50"
+SHEET_FORMAT = "1"  # Bump when the page design changes so cached pages are re-rendered
+# Fallbacks for Thai names and notes, used if installed (Windows, then Linux fonts)
+THAI_FONTS = ["Tahoma", "Leelawadee UI", "TH Sarabun New", "Noto Sans Thai", "Loma", "Garuda"]
+
+
+# ------------------------ Page Rendering ------------------------
+def font_family():
+    """DejaVu Sans for Latin text, then whichever Thai fonts this machine has."""
+    from matplotlib import font_manager
+    installed = {font.name for font in font_manager.fontManager.ttflist}
+    return ["DejaVu Sans"] + [name for name in THAI_FONTS if name in installed]
+
+
+def render_sheet(path, date, rows, fmt):
+    """
+    Draws one printable page: the day's Gantt chart from gantt.py above a
+    table of the appointments. Only uses the Agg canvas, so no GUI backend
+    is ever loaded. Fonts are set on this page's own text, never through
+    rcParams, since the single-day path runs in the Streamlit server's threads.
+    """
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+    from matplotlib.text import Text
+    from gantt import draw_gantt, gantt_layout, setup_axes
+
+    figure = Figure(figsize=PAGE_SIZE, facecolor="white")
+    FigureCanvasAgg(figure)
+    chart_ax, table_ax = figure.subplots(2, 1, gridspec_kw={"height_ratios": [3, 2]})
+    title = f"Appointment Schedule for {date}"
+    if rows.empty:
+        chart_ax.axis("off")
+        chart_ax.set_title(title, fontsize=14, color=TITLE_COLOR, weight="bold")
+        chart_ax.text(0.5, 0.5, "No appointments", ha="center", va="center", fontsize=12, color=TEXT_COLOR)
+    else:
+        collection = setup_axes(chart_ax, TEXT_COLOR)
+        draw_gantt(chart_ax, collection, [], gantt_layout(rows, date), title, TITLE_COLOR)
+
+    table_ax.axis("off")
+    if not rows.empty:
+        cells = rows.sort_values("StartTime")[["StartTime", "EndTime", "Name", "Phone", "Note"]].values.tolist()
+        table = table_ax.table(cellText=cells, colLabels=["Start", "End", "Name", "Phone", "Note"],
+                               colWidths=[0.08, 0.08, 0.22, 0.14, 0.48], loc="upper center", cellLoc="left")
+        table.auto_set_font_size(False)
+        table.set_fontsize(8)
+    family = font_family()
+    for text in figure.findobj(Text):
+        text.set_fontfamily(family)
+    figure.tight_layout()
+    figure.savefig(path, format=fmt, dpi=PNG_DPI)
+    return path
+
+
+# ------------------------ Cache ------------------------
+def day_rows(df, first_day, last_day):
+    """{YYYY-MM-DD: that day's rows} for every day in the range, empty days included."""
+    df = df.reindex(columns=COLUMNS).fillna("").astype(str)
+    days = pd.date_range(first_day, last_day).strftime("%Y-%m-%d")
+    df = df[df["Date"].isin(days)]
+    groups = dict(tuple(df.groupby("Date")))
+    return {day: groups.get(day, df.iloc[:0]) for day in days}
+
+
+def cache_path(date, rows, fmt, cache_dir):
+    # Keyed by the day's own rows, so edits on other days do not invalidate this page
+    digest = hashlib.sha1(SHEET_FORMAT.encode("utf-8"))
+    digest.update(pd.util.hash_pandas_object(rows[COLUMNS], index=False).to_numpy().tobytes())
+    return os.path.join(cache_dir, f"{date}_{digest.hexdigest()[:16]}.{fmt}")
+
+
+def prune_sheet_cache(cache_dir, keep, fmt):
+    """Removes cached pages in `fmt` for the same days that are no longer current."""
+    keep = {os.path.basename(path) for path in keep}
+    days = {name.split("_")[0] for name in keep}
+    for entry in os.scandir(cache_dir):
+        if entry.name.split("_")[0] in days and entry.name.endswith("." + fmt) and entry.name not in keep:
+            try:
+                os.remove(entry.path)
+            except FileNotFoundError:
+                pass
+
+
+def render_to_cache(path, date, rows, fmt):
+    # Rendered under a temp name so a half-written page is never picked up from the cache
+    temp_path = temp_name(path)
+    render_sheet(temp_path, date, rows, fmt)
+    os.replace(temp_path, path)
+    return path
+
+
+# ------------------------ Batch ------------------------
+def render_sheets(first_day, last_day, out_dir, fmt="pdf", df=None, workers=None, progress=None,
+                  cache_dir=SHEET_CACHE_DIR):
+    """
+    Writes schedule_YYYY-MM-DD.<fmt> for every day from `first_day` to
+    `last_day` into `out_dir`. Pages whose day has not changed since they
+    were last rendered come from the cache; the rest are rendered across a
+    process pool. `progress(done, total, date)` is called as each page is
+    ready. Returns the page paths in date order.
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown format '{fmt}', expected one of {', '.join(FORMATS)}")
+    if df is None:
+        df = load_appointments()
+    os.makedirs(cache_dir, exist_ok=True)
+    os.makedirs(out_dir, exist_ok=True)
+
+    days = day_rows(df, first_day, last_day)
+    cached = {day: cache_path(day, rows, fmt, cache_dir) for day, rows in days.items()}
+    missing = [day for day, path in cached.items() if not os.path.exists(path)]
+    total = len(days)
+    done = total - len(missing)
+    if progress is not None and done:
+        progress(done, total, None)
+
+    workers = min(workers or os.cpu_count() or 1, len(missing))
+    if workers <= 1:
+        for day in missing:
+            render_to_cache(cached[day], day, days[day], fmt)
+            done += 1
+            if progress is not None:
+                progress(done, total, day)
+    else:
+        # Spawned, not forked: forking the multi-threaded Streamlit server can copy a held lock into a worker
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as executor:
+            futures = {executor.submit(render_to_cache, cached[day], day, days[day], fmt): day for day in missing}
+            for future in as_completed(futures):
+                future.result()
+                done += 1
+                if progress is not None:
+                    progress(done, total, futures[future])
+    prune_sheet_cache(cache_dir, cached.values(), fmt)
+
+    paths = []
+    for day, source in cached.items():
+        path = os.path.join(out_dir, f"schedule_{day}.{fmt}")
+        shutil.copyfile(source, path)
+        paths.append(path)
+    return paths
+
+
+# ------------------------ Command Line ------------------------
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Render printable daily schedule sheets.")
+    parser.add_argument("start", help="first day, YYYY-MM-DD")
+    parser.add_argument("end", nargs="?", help="last day, YYYY-MM-DD (default: same as start)")
+    parser.add_argument("--format", dest="fmt", choices=FORMATS, default="pdf")
+    parser.add_argument("--out", default="schedules", help="output directory (default: schedules)")
+    parser.add_argument("--workers", type=int, help="worker processes (default: CPU count)")
+    parser.add_argument("--file", default=FILE_NAME, help="appointment CSV (default: data.csv)")
+    args = parser.parse_args(argv)
+
+    paths = render_sheets(args.start, args.end or args.start, args.out, args.fmt, load_appointments(args.file),
+                          args.workers, progress=lambda done, total, day: print(f"{done}/{total} {day or 'cached'}", flush=True))
+    print(f"Wrote {len(paths)} sheets to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
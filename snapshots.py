@@ -0,0 +1,252 @@
+import argparse
+import gzip
+import hashlib
+import json
+import lzma
+import os
+import time
+import zlib
+from datetime import datetime, timedelta
+from appointment_store import FILE_NAME, data_version, write_atomic
+
+# ------------------------ Configuration ------------------------
+BACKUP_DIR = "backups"
+CODECS = {"lzma": (".xz", lzma), "gzip": (".gz", gzip)}
+DEFAULT_CODEC = "lzma"
+BOUNDARY_MASK = 63  # A chunk ends after a line whose checksum has these bits clear: ~64 lines per chunk
+MIN_CHUNK_LINES = 16
+MAX_CHUNK_LINES = 1024
+SNAPSHOT_NAME_FORMAT = "%Y%m%dT%H%M%S%f"
+SNAPSHOT_EVERY_MINUTES = 60
+
+
+# ------------------------ Chunking ------------------------
+def split_chunks(data):
+    """
+    Cuts the file into chunks at line boundaries chosen by the lines'
+    content, not their position. Appending or editing a few rows therefore
+    only changes the chunks around them; every other chunk keeps its hash
+    and is already in the store.
+    """
+    chunks = []
+    lines = []
+    for line in data.splitlines(keepends=True):
+        lines.append(line)
+        if len(lines) >= MAX_CHUNK_LINES or (
+                len(lines) >= MIN_CHUNK_LINES and zlib.crc32(line) & BOUNDARY_MASK == 0):
+            chunks.append(b"".join(lines))
+            lines = []
+    if lines:
+        chunks.append(b"".join(lines))
+    return chunks
+
+
+def chunk_path(backup_dir, digest, codec):
+    return os.path.join(backup_dir, "chunks", digest[:2], digest + CODECS[codec][0])
+
+
+def find_chunk(backup_dir, digest):
+    """Path of a stored chunk in whichever codec it was written with, or None."""
+    for codec in CODECS:
+        path = chunk_path(backup_dir, digest, codec)
+        if os.path.exists(path):
+            return path
+    return None
+
+
+# ------------------------ Snapshots ------------------------
+def manifest_dir(backup_dir):
+    return os.path.join(backup_dir, "manifests")
+
+
+def list_snapshots(backup_dir=BACKUP_DIR):
+    """Returns [(taken at, manifest path)] oldest first."""
+    folder = manifest_dir(backup_dir)
+    if not os.path.isdir(folder):
+        return []
+    snapshots = []
+    for name in os.listdir(folder):
+        if name.endswith(".json"):
+            try:
+                snapshots.append((datetime.strptime(name[:-5], SNAPSHOT_NAME_FORMAT), os.path.join(folder, name)))
+            except ValueError:
+                continue
+    return sorted(snapshots)
+
+
+def load_manifest(path):
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def read_stable(file_name):
+    """Reads the whole store, retrying if it was rewritten while being read."""
+    for _ in range(5):
+        before = data_version(file_name)
+        with open(file_name, "rb") as f:
+            data = f.read()
+        if data_version(file_name) == before:
+            return data
+        time.sleep(0.1)
+    raise RuntimeError(f"{file_name} kept changing while being backed up")
+
+
+def take_snapshot(file_name=FILE_NAME, backup_dir=BACKUP_DIR, codec=DEFAULT_CODEC):
+    """
+    Stores a snapshot of `file_name`: new chunks are compressed with `codec`
+    and written once under their SHA-1, then a manifest lists the chunks in
+    order. Nothing is written if the file is unchanged since the latest
+    snapshot. Returns (manifest path or None, chunks written).
+    """
+    data = read_stable(file_name)
+    digest = hashlib.sha1(data).hexdigest()
+    snapshots = list_snapshots(backup_dir)
+    if snapshots and load_manifest(snapshots[-1][1])["sha1"] == digest:
+        return None, 0
+
+    written = 0
+    hashes = []
+    for chunk in split_chunks(data):
+        chunk_hash = hashlib.sha1(chunk).hexdigest()
+        hashes.append(chunk_hash)
+        if find_chunk(backup_dir, chunk_hash) is None:
+            path = chunk_path(backup_dir, chunk_hash, codec)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            write_atomic(path, CODECS[codec][1].compress(chunk))
+            written += 1
+
+    # The manifest is written last: a crash before it only leaves unreferenced chunks
+    taken = datetime.now()
+    if snapshots and taken <= snapshots[-1][0]:
+        taken = snapshots[-1][0] + timedelta(microseconds=1)
+    os.makedirs(manifest_dir(backup_dir), exist_ok=True)
+    path = os.path.join(manifest_dir(backup_dir), taken.strftime(SNAPSHOT_NAME_FORMAT) + ".json")
+    manifest = {"taken": taken.isoformat(), "file": os.path.basename(file_name), "size": len(data),
+                "sha1": digest, "chunks": hashes}
+    write_atomic(path, json.dumps(manifest).encode("utf-8"))
+    return path, written
+
+
+def snapshot_as_of(when, backup_dir=BACKUP_DIR):
+    """The manifest path of the latest snapshot taken at or before `when`, or None."""
+    matches = [path for taken, path in list_snapshots(backup_dir) if taken <= when]
+    return matches[-1] if matches else None
+
+
+def restore(when, file_name=FILE_NAME, backup_dir=BACKUP_DIR):
+    """
+    Rebuilds `file_name` as it was at `when` (a datetime) from the latest
+    snapshot at or before it. Returns the manifest used.
+    """
+    path = snapshot_as_of(when, backup_dir)
+    if path is None:
+        raise ValueError(f"No snapshot taken at or before {when:%Y-%m-%d %H:%M:%S}")
+    return restore_snapshot(path, file_name, backup_dir)
+
+
+def restore_snapshot(path, file_name=FILE_NAME, backup_dir=BACKUP_DIR):
+    """
+    Rebuilds `file_name` from the snapshot whose manifest is at `path`. The
+    rebuilt bytes are checked against the snapshot's hash before they
+    replace the file. Returns the manifest.
+    """
+    manifest = load_manifest(path)
+
+    parts = []
+    for chunk_hash in manifest["chunks"]:
+        source = find_chunk(backup_dir, chunk_hash)
+        if source is None:
+            raise RuntimeError(f"Snapshot {manifest['taken']} is missing chunk {chunk_hash}")
+        codec = next(name for name, (ext, _) in CODECS.items() if source.endswith(ext))
+        with open(source, "rb") as f:
+            parts.append(CODECS[codec][1].decompress(f.read()))
+    data = b"".join(parts)
+    if hashlib.sha1(data).hexdigest() != manifest["sha1"]:
+        raise RuntimeError(f"Snapshot {manifest['taken']} does not match its checksum")
+
+    write_atomic(file_name, data)
+    return manifest
+
+
+def prune_snapshots(keep, backup_dir=BACKUP_DIR):
+    """Deletes all but the newest `keep` snapshots and the chunks only they used. Returns (snapshots, chunks) removed."""
+    snapshots = list_snapshots(backup_dir)
+    old = snapshots[:-keep] if keep > 0 else snapshots
+    for _, path in old:
+        os.remove(path)
+
+    used = set()
+    for _, path in snapshots[len(old):]:
+        used.update(load_manifest(path)["chunks"])
+    removed = 0
+    chunk_root = os.path.join(backup_dir, "chunks")
+    for folder, _, names in os.walk(chunk_root):
+        for name in names:
+            if not name.endswith(".tmp") and name.split(".")[0] not in used:
+                os.remove(os.path.join(folder, name))
+                removed += 1
+    return len(old), removed
+
+
+# ------------------------ Command Line ------------------------
+def parse_when(text):
+    """'YYYY-MM-DD', 'YYYY-MM-DD HH:MM' or 'YYYY-MM-DDTHH:MM:SS'; a bare date means the end of that day."""
+    when = datetime.fromisoformat(text)
+    if len(text) == 10:
+        when = when.replace(hour=23, minute=59, second=59, microsecond=999999)
+    return when
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Incremental compressed snapshots of the appointment store.")
+    parser.add_argument("--file", default=FILE_NAME, help="appointment CSV (default: data.csv)")
+    parser.add_argument("--dir", dest="backup_dir", default=BACKUP_DIR, help="backup directory (default: backups)")
+    commands = parser.add_subparsers(dest="command", required=True)
+    snapshot = commands.add_parser("snapshot", help="take a snapshot now")
+    snapshot.add_argument("--codec", choices=CODECS, default=DEFAULT_CODEC)
+    snapshot.add_argument("--every", type=int, metavar="MINUTES",
+                          help=f"keep running and take a snapshot every MINUTES (e.g. {SNAPSHOT_EVERY_MINUTES})")
+    commands.add_parser("list", help="list snapshots")
+    restore_cmd = commands.add_parser("restore", help="rebuild the store as of a time")
+    restore_cmd.add_argument("when", help="YYYY-MM-DD[ HH:MM[:SS]]; a bare date restores the end of that day")
+    restore_cmd.add_argument("--to", help="write here instead of over the store")
+    prune = commands.add_parser("prune", help="delete old snapshots and their unused chunks")
+    prune.add_argument("--keep", type=int, required=True, help="number of newest snapshots to keep")
+    args = parser.parse_args(argv)
+
+    if args.command == "snapshot":
+        while True:
+            path, written = take_snapshot(args.file, args.backup_dir, args.codec)
+            print(f"Snapshot {os.path.basename(path)} ({written} new chunks)" if path else "Unchanged, no snapshot taken",
+                  flush=True)
+            if not args.every:
+                break
+            time.sleep(args.every * 60)
+    elif args.command == "list":
+        for taken, path in list_snapshots(args.backup_dir):
+            manifest = load_manifest(path)
+            print(f"{taken:%Y-%m-%d %H:%M:%S}  {manifest['size']:>10} bytes  {len(manifest['chunks'])} chunks")
+    elif args.command == "restore":
+        try:
+            when = parse_when(args.when)
+        except ValueError:
+            parser.error(f"invalid time '{args.when}', expected YYYY-MM-DD[ HH:MM[:SS]]")
+        # Looked up first, so a restore that cannot happen leaves no extra snapshot behind
+        path = snapshot_as_of(when, args.backup_dir)
+        if path is None:
+            parser.exit(1, f"No snapshot taken at or before {when:%Y-%m-%d %H:%M:%S}\n")
+        # The current file is snapshotted first, so a restore can itself be undone
+        if args.to is None and os.path.exists(args.file):
+            take_snapshot(args.file, args.backup_dir)
+        try:
+            manifest = restore_snapshot(path, args.to or args.file, args.backup_dir)
+        except (OSError, RuntimeError, ValueError) as e:
+            parser.exit(1, f"Restore failed: {e}\n")
+        print(f"Restored {args.to or args.file} from the snapshot taken {manifest['taken']}")
+    else:
+        snapshots, chunks = prune_snapshots(args.keep, args.backup_dir)
+        print(f"Removed {snapshots} snapshots and {chunks} chunks")
+
+
+if __name__ == "__main__":
+    main()
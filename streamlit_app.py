@@ -1,15 +1,44 @@
 import streamlit as st
 import pandas as pd
 import plotly.express as px
+import plotly.io as pio
 from datetime import datetime, timedelta
+import hashlib
+import io
 import os
+import tempfile
+import zipfile
 from openpyxl import load_workbook
+from appointment_store import COLUMNS, data_version
+from appointment_index import AppointmentIndex, UpcomingCursor
+from note_search import NoteIndex
+from rollups import current_rollups, record_change, record_changes, rollup_frame
+from change_feed import publish_changes
+from query_cache import QueryCache
+from bulk_edit import apply_changes, diff_rows
+from validation import validate_appointments
+from excel_export import build_workbook
+from batch_reports import generate_reports
+from importer import import_file
+from schedule_sheets import render_sheets
+from timeline import day_timeline, range_timeline
+from occupancy import busy_hours, occupancy_matrix
 
 # ------------------------ Configuration ------------------------
 FILE_NAME = "data.csv"
 EXCEL_EXPORT = "appointments.xlsx"
 PASSWORD = "Akam_morya"
 USERNAME = "Akamsila"
+REPORT_LEVELS = {"รายวัน": "daily", "รายสัปดาห์": "weekly", "รายเดือน": "monthly"}
+NOTE_SEARCH_LIMIT = 50
+QUERY_CACHE_SIZE = 256
+UPCOMING_WINDOWS = {"24 ชั่วโมง": timedelta(hours=24), "3 วัน": timedelta(days=3),
+                    "7 วัน": timedelta(days=7), "30 วัน": timedelta(days=30)}
+UPCOMING_BATCH = 50
+MAX_ERRORS_SHOWN = 20
+MAX_TIMELINE_DAYS = 31
+IMPORT_DIR = "imports"  # Uploaded files are kept here so an interrupted import can resume
+BATCH_REPORT_PARTITIONS = {"แยกตามเดือน": "month", "แยกตามปี": "year"}
 
 # ------------------------ Login Page ------------------------
 def login():
@@ -38,40 +67,243 @@ def load_data():
         return pd.DataFrame(columns=["Name", "Date", "StartTime", "EndTime", "Phone", "Note"])
     return pd.read_csv(FILE_NAME, dtype={"Phone": str})
 
+@st.cache_resource(max_entries=8)
+def get_appointment_index(version, search_name=""):
+    # version is only part of the cache key: a write to data.csv builds a fresh index
+    return AppointmentIndex(load_data(), search_name)
+
+@st.cache_resource(max_entries=2)
+def get_upcoming_cursor(version):
+    return UpcomingCursor(load_data(), version=version)
+
+@st.cache_resource
+def note_index_holder():
+    return NoteIndex()
+
+def get_note_index():
+    # Writes below keep the index current; a full rebuild only happens if data.csv changed elsewhere
+    note_index = note_index_holder()
+    version = data_version(FILE_NAME)
+    if note_index.version != version:
+        note_index.rebuild(load_data()["Note"], version)
+    return note_index
+
+@st.cache_resource
+def query_cache_holder():
+    return QueryCache(max_entries=QUERY_CACHE_SIZE)
+
+def get_query_cache():
+    # Writes below evict only the months they touch; a write from elsewhere clears everything
+    query_cache = query_cache_holder()
+    version = data_version(FILE_NAME)
+    if query_cache.version != version:
+        query_cache.clear()
+        query_cache.version = version
+    return query_cache
+
+def load_day(day):
+    return load_range(day, day)
+
+def load_range(first_day, last_day):
+    df = load_data()
+    df = df[(df["Date"] >= first_day.strftime("%Y-%m-%d")) & (df["Date"] <= last_day.strftime("%Y-%m-%d"))].copy()
+    df["Start"] = pd.to_datetime(df["Date"] + " " + df["StartTime"])
+    df["End"] = pd.to_datetime(df["Date"] + " " + df["EndTime"])
+    return df
+
+def day_timeline_json(day):
+    df = get_query_cache().get_or_compute("day", {"date": day}, [day], lambda: load_day(day))
+    if df.empty:
+        return None
+    return day_timeline(df, f"🕒 นัดหมายประจำวันที่ {day.strftime('%d %B %Y')}").to_json()
+
+def range_timeline_json(first_day, last_day):
+    df = load_range(first_day, last_day)
+    if df.empty:
+        return None
+    title = f"🗓 นัดหมาย {first_day.strftime('%d %b')} - {last_day.strftime('%d %b %Y')} ({len(df)} รายการ)"
+    return range_timeline(df, first_day, last_day, title).to_json()
+
+def heatmap_json(first_day, last_day):
+    days, matrix = occupancy_matrix(load_range(first_day, last_day), first_day, last_day)
+    first_hour, last_hour = busy_hours(matrix)
+    # Minutes booked per hour / 60 = average number of customers in that hour
+    fig = px.imshow(matrix[:, first_hour:last_hour + 1] / 60, aspect="auto", color_continuous_scale="YlOrRd",
+                    x=[f"{h:02d}:00" for h in range(first_hour, last_hour + 1)],
+                    y=days.strftime("%a %d/%m").tolist(), labels=dict(color="ลูกค้าเฉลี่ย"),
+                    title=f"🔥 ความหนาแน่น {first_day.strftime('%d %b')} - {last_day.strftime('%d %b %Y')}")
+    fig.update_layout(xaxis_title="ชั่วโมง", yaxis_title="วันที่", template="plotly_white",
+                      height=max(400, 24 * len(days)))
+    return fig.to_json()
+
+@st.cache_data(max_entries=16, show_spinner=False)
+def excel_download(version, search_name=""):
+    # version is only part of the cache key: a write to data.csv builds a fresh workbook
+    df = load_data()
+    if search_name:
+        df = df[df["Name"].str.contains(search_name, case=False, na=False, regex=False)]
+    buffer = io.BytesIO()
+    build_workbook(df, buffer)
+    return buffer.getvalue()
+
 def save_appointment(name, date, start, end, phone, note):
+    note_index = get_note_index()
+    query_cache = get_query_cache()
+    before = data_version(FILE_NAME)
     df = load_data()
     new_data = pd.DataFrame([[name, date, start, end, phone, note]],
                             columns=["Name", "Date", "StartTime", "EndTime", "Phone", "Note"])
     df = pd.concat([df, new_data], ignore_index=True)
     df.to_csv(FILE_NAME, index=False)
+    after = data_version(FILE_NAME)
+    note_index.add(len(df) - 1, note)
+    note_index.version = after
+    query_cache.invalidate([date])
+    query_cache.version = after
+    record_change(before, after, new=new_data.iloc[0].to_dict(), file_name=FILE_NAME)
+    publish_changes(before, after, [(None, new_data.iloc[0].to_dict())], file_name=FILE_NAME)
     st.success("💾 Appointment saved successfully!")
     export_to_excel(df)
 
 def update_appointment(index, name, date, start, end, phone, note):
+    note_index = get_note_index()
+    query_cache = get_query_cache()
+    before = data_version(FILE_NAME)
     df = load_data()
     if index in df.index:
+        old = df.loc[index].to_dict()
         df.loc[index] = [name, date, start, end, phone, note]
         df.to_csv(FILE_NAME, index=False)
+        after = data_version(FILE_NAME)
+        note_index.update(index, note)
+        note_index.version = after
+        query_cache.invalidate([old["Date"], date])
+        query_cache.version = after
+        record_change(before, after, old=old, new=df.loc[index].to_dict(), file_name=FILE_NAME)
+        publish_changes(before, after, [(old, df.loc[index].to_dict())], file_name=FILE_NAME)
         st.success("✅ แก้ไขเรียบร้อยแล้ว!")
         export_to_excel(df)
 
 def delete_appointment(index):
+    note_index = get_note_index()
+    query_cache = get_query_cache()
+    before = data_version(FILE_NAME)
     df = load_data()
     if index in df.index:
+        old = df.loc[index].to_dict()
         df = df.drop(index).reset_index(drop=True)
         df.to_csv(FILE_NAME, index=False)
+        after = data_version(FILE_NAME)
+        note_index.delete(index)
+        note_index.version = after
+        query_cache.invalidate([old["Date"]])
+        query_cache.version = after
+        record_change(before, after, old=old, file_name=FILE_NAME)
+        publish_changes(before, after, [(old, None)], file_name=FILE_NAME)
         st.success("🗑️ ลบเรียบร้อยแล้ว!")
         export_to_excel(df)
 
+def commit_batch(df, updates, deletes, inserts):
+    # One CSV write and one Excel export for the whole grid, however many rows changed
+    note_index = get_note_index()
+    query_cache = get_query_cache()
+    before = data_version(FILE_NAME)
+    old_rows = {idx: df.loc[idx].to_dict() for idx in list(updates) + deletes}
+    new_df = apply_changes(df, updates, deletes, inserts)
+    new_df.to_csv(FILE_NAME, index=False)
+    after = data_version(FILE_NAME)
+
+    for idx, row in updates.items():
+        note_index.update(idx, row["Note"])
+    for idx in sorted(deletes, reverse=True):
+        note_index.delete(idx)
+    for idx, row in enumerate(inserts, start=len(new_df) - len(inserts)):
+        note_index.add(idx, row["Note"])
+    note_index.version = after
+    touched = [row["Date"] for row in old_rows.values()] + [row["Date"] for row in list(updates.values()) + inserts]
+    query_cache.invalidate(touched)
+    query_cache.version = after
+    changes = [(old, updates.get(idx)) for idx, old in old_rows.items()] + [(None, row) for row in inserts]
+    record_changes(before, after, changes, file_name=FILE_NAME)
+    publish_changes(before, after, changes, file_name=FILE_NAME)
+
+    st.success(f"✅ บันทึกแล้ว: แก้ไข {len(updates)} · ลบ {len(deletes)} · เพิ่ม {len(inserts)} รายการ")
+    export_to_excel(new_df)
+
 def export_to_excel(df):
-    df["Date"] = pd.to_datetime(df["Date"])
-    grouped = df.groupby([df["Date"].dt.year, df["Date"].dt.month])
+    # Months whose rows are unchanged reuse their cached sheet; only edited months are rebuilt
+    build_workbook(df, EXCEL_EXPORT)
+
+# ------------------------ List Views ------------------------
+def select_appointment(rows, key):
+    """Shows (index, row) pairs as one read-only table and returns the pair the user selected."""
+    table = pd.DataFrame([row for _, row in rows], columns=COLUMNS)
+    # Streamlit keeps a selection by position while the key stays the same. Keying on the shown
+    # row ids and the data version means paging, a refresh that drops a booking, or an update or
+    # delete starts with nothing selected instead of pointing the form at another appointment.
+    shown = hashlib.sha1(repr((data_version(FILE_NAME), [index for index, _ in rows])).encode("utf-8")).hexdigest()
+    event = st.dataframe(table, on_select="rerun", selection_mode="single-row",
+                         hide_index=True, use_container_width=True, key=f"{key}_{shown[:16]}")
+    selected = event.selection.rows
+    if selected and selected[0] < len(rows):
+        return rows[selected[0]]
+    st.caption("👆 เลือกรายการในตารางเพื่อแก้ไขหรือลบ")
+    return None
+
+def show_edit_form(index, row, form_key):
+    # Only the selected appointment gets a form, so render cost does not grow with the list
+    st.markdown(f"#### ✏️ {row['Date']} {row['StartTime']} - {row['EndTime']} | {row['Name']}")
+    with st.form(f"{form_key}_{index}"):
+        col1, col2 = st.columns(2)
+        name = col1.text_input("👤 Name", value=row["Name"])
+        phone = col2.text_input("📞 Phone", value=row["Phone"] if isinstance(row["Phone"], str) else "")
+        note = st.text_area("📝 Note", value=row["Note"] if isinstance(row["Note"], str) else "")
+        date = st.date_input("📅 Date", value=datetime.strptime(row["Date"], "%Y-%m-%d"))
+        start_time = st.time_input("⏰ Start", value=datetime.strptime(row["StartTime"], "%H:%M").time())
+        end_time = st.time_input("⏱ End", value=datetime.strptime(row["EndTime"], "%H:%M").time())
+        col_btn1, col_btn2 = st.columns(2)
+        if col_btn1.form_submit_button("💾 แก้ไข"):
+            update_appointment(index, name, date.strftime("%Y-%m-%d"),
+                               start_time.strftime("%H:%M"), end_time.strftime("%H:%M"),
+                               phone, note)
+            st.rerun()
+        if col_btn2.form_submit_button("🗑️ ลบ"):
+            delete_appointment(index)
+            st.rerun()
+
+# ------------------------ Upcoming ------------------------
+@st.fragment(run_every="60s")
+def show_upcoming():
+    # Reruns on its own every minute; the cursor skips past bookings instead of rescanning them
+    cursor = get_upcoming_cursor(data_version(FILE_NAME))
+    now = datetime.now()
+    window = st.radio("แสดงล่วงหน้า", list(UPCOMING_WINDOWS), index=1, horizontal=True, key="upcoming_window")
+    until = now + UPCOMING_WINDOWS[window]
+    # "Load more" grows the limit in batches; changing the window starts over
+    if st.session_state.get("upcoming_limit_window") != window:
+        st.session_state.upcoming_limit_window = window
+        st.session_state.upcoming_limit = UPCOMING_BATCH
 
-    with pd.ExcelWriter(EXCEL_EXPORT, engine="openpyxl") as writer:
-        for (year, month), group in grouped:
-            sheet_name = f"{year}_{month:02d}"
-            group = group.drop(columns=["Start", "End"], errors='ignore')
-            group.to_excel(writer, sheet_name=sheet_name, index=False)
+    in_window = cursor.count(now, until)
+    later = cursor.count(until)
+    daily = cursor.daily_counts(now, until)
+    if daily:
+        st.dataframe(pd.DataFrame(daily, columns=["วันที่", "จำนวนนัดหมาย"]), hide_index=True)
+
+    upcoming = cursor.upcoming(now, limit=st.session_state.upcoming_limit, until=until)
+    if upcoming:
+        summary = f"แสดง {len(upcoming)} จาก {in_window} นัดหมายใน {window} ข้างหน้า"
+        st.caption(summary + (f" (หลังจากนั้นอีก {later} รายการ)" if later else ""))
+        selected = select_appointment(upcoming, key="upcoming_table")
+        if len(upcoming) < in_window and st.button("⬇️ โหลดเพิ่ม"):
+            st.session_state.upcoming_limit += UPCOMING_BATCH
+            st.rerun()
+        if selected:
+            show_edit_form(*selected, form_key="upcoming_edit_form")
+    elif later:
+        st.info(f"📭 ไม่มีนัดหมายใน {window} ข้างหน้า (หลังจากนั้นอีก {later} รายการ)")
+    else:
+        st.info("📭 ยังไม่มีนัดหมายถัดไป")
 
 # ------------------------ Main App ------------------------
 def main_app():
@@ -89,15 +321,17 @@ def main_app():
                         ["➕ เพิ่มนัดหมาย", 
                          "⏳ นัดหมายที่จะมาถึง", 
                          "📅 นัดหมายทั้งหมด", 
-                         "📊 แผนภูมิเวลา"], 
+                         "📊 แผนภูมิเวลา",
+                         "🔥 ความหนาแน่นรายสัปดาห์/เดือน",
+                         "📈 รายงานการใช้งาน",
+                         "🗂 แก้ไขหลายรายการ",
+                         "📥 นำเข้าข้อมูล"], 
                         key="menu_selection")
         st.markdown("---")
         if st.button("📕 ออกจากระบบ"):
             st.session_state.logged_in = False
             st.rerun()
 
-    df = load_data()
-
     # เพิ่มนัดหมาย
     if menu == "➕ เพิ่มนัดหมาย":
         with st.form("appointment_form"):
@@ -128,97 +362,244 @@ def main_app():
     # นัดหมายทั้งหมด
     elif menu == "📅 นัดหมายทั้งหมด":
         st.markdown("### 📋 All Appointments")
+        search_mode = st.radio("โหมดค้นหา", ["👤 ชื่อลูกค้า", "📝 อาการ / หมายเหตุ"], horizontal=True)
+        if search_mode == "📝 อาการ / หมายเหตุ":
+            query = st.text_input("🔍 ค้นหาอาการในหมายเหตุ", placeholder="เช่น ปวดไหล่, นวดรีดเส้น")
+            if query:
+                hits = get_query_cache().get_or_compute(
+                    "notes", {"query": query}, None,
+                    lambda: get_note_index().search(query, limit=NOTE_SEARCH_LIMIT))
+                rows = get_appointment_index(data_version(FILE_NAME)).rows
+                if hits:
+                    st.caption(f"พบ {len(hits)} รายการที่ตรงที่สุด")
+                    st.dataframe(pd.DataFrame([{**rows[index], "Score": round(score, 2)} for index, score in hits]),
+                                 use_container_width=True, hide_index=True)
+                else:
+                    st.info(f"❗ ไม่พบหมายเหตุที่มีคำว่า \"{query}\"")
+            return
+
         search_name = st.text_input("🔍 ค้นหาชื่อลูกค้า", placeholder="ใส่ชื่อลูกค้าที่ต้องการค้นหา...")
-        df_filtered = df.copy()
-        if search_name:
-            df_filtered = df_filtered[df_filtered["Name"].str.contains(search_name, case=False, na=False)]
-        df_filtered = df_filtered.sort_values(by=["Date", "StartTime"])
-
-        if not df_filtered.empty:
-            if st.button("⬇️ ดาวน์โหลดเป็น Excel"):
-                with pd.ExcelWriter(EXCEL_EXPORT, engine="openpyxl", mode="w") as writer:
-                    for month, group in df_filtered.groupby(df_filtered["Date"].str[:7]):
-                        group.to_excel(writer, sheet_name=month, index=False)
-                with open(EXCEL_EXPORT, "rb") as f:
-                    st.download_button("📥 Download Excel File", f, file_name=EXCEL_EXPORT)
+        appt_index = get_appointment_index(data_version(FILE_NAME), search_name)
+
+        if len(appt_index):
+            # Built in memory only when clicked, and shared by every user until data.csv changes
+            version = data_version(FILE_NAME)
+            st.download_button("⬇️ ดาวน์โหลดเป็น Excel", lambda: excel_download(version, search_name),
+                               file_name=EXCEL_EXPORT, on_click="ignore",
+                               mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")
 
         rows_per_page = st.selectbox("แสดงจำนวนรายการต่อหน้า", [10, 20, 50], index=0)
-        total_rows = len(df_filtered)
-        total_pages = (total_rows - 1) // rows_per_page + 1
-        page = st.number_input("เลือกหน้า", min_value=1, max_value=total_pages, value=1, step=1)
-        start_idx = (page - 1) * rows_per_page
-        end_idx = start_idx + rows_per_page
-        df_page = df_filtered.iloc[start_idx:end_idx]
-
-        for i, row in df_page.iterrows():
-            index = df_filtered.index[start_idx + i]
-            with st.expander(f"📌 {row['Date']} {row['StartTime']} - {row['EndTime']} | {row['Name']}"):
-                with st.form(f"edit_form_{index}"):
-                    col1, col2 = st.columns(2)
-                    name = col1.text_input("👤 Name", value=row["Name"])
-                    phone = col2.text_input("📞 Phone", value=row["Phone"])
-                    note = st.text_area("📝 Note", value=row["Note"])
-                    date = st.date_input("📅 Date", value=datetime.strptime(row["Date"], "%Y-%m-%d"))
-                    start_time = st.time_input("⏰ Start", value=datetime.strptime(row["StartTime"], "%H:%M").time())
-                    end_time = st.time_input("⏱ End", value=datetime.strptime(row["EndTime"], "%H:%M").time())
-                    col_btn1, col_btn2 = st.columns(2)
-                    if col_btn1.form_submit_button("💾 แก้ไข"):
-                        update_appointment(index, name, date.strftime("%Y-%m-%d"),
-                                           start_time.strftime("%H:%M"), end_time.strftime("%H:%M"),
-                                           phone, note)
-                        st.rerun()
-                    if col_btn2.form_submit_button("🗑️ ลบ"):
-                        delete_appointment(index)
-                        st.rerun()
+        # Keyset cursor: ("after", key) or ("before", key), reset whenever the query changes
+        if st.session_state.get("page_query") != (search_name, rows_per_page):
+            st.session_state.page_query = (search_name, rows_per_page)
+            st.session_state.page_cursor = ("after", None)
+        direction, cursor = st.session_state.page_cursor
+        if direction == "before":
+            page = appt_index.page_before(cursor, rows_per_page)
+            if len(page) < rows_per_page:
+                page = appt_index.page_after(None, rows_per_page)
+        else:
+            page = appt_index.page_after(cursor, rows_per_page)
+            if not page:
+                page = appt_index.page_before(None, rows_per_page)
+
+        total_rows = len(appt_index)
+        total_pages = max(1, (total_rows - 1) // rows_per_page + 1)
+        first_rank = appt_index.rank(page[0]) if page else 0
+        col_prev, col_info, col_next = st.columns([1, 2, 1])
+        if col_prev.button("⬅️ ก่อนหน้า", disabled=first_rank == 0):
+            st.session_state.page_cursor = ("before", page[0])
+            st.rerun()
+        col_info.markdown(f"หน้า {first_rank // rows_per_page + 1} / {total_pages} ({total_rows} รายการ)")
+        if col_next.button("ถัดไป ➡️", disabled=first_rank + len(page) >= total_rows):
+            st.session_state.page_cursor = ("after", page[-1])
+            st.rerun()
+
+        selected = select_appointment(appt_index.fetch(page), key="all_table")
+        if selected:
+            show_edit_form(*selected, form_key="edit_form")
 
     # นัดหมายที่จะมาถึง
     elif menu == "⏳ นัดหมายที่จะมาถึง":
         st.markdown("### ⏳ นัดหมายที่จะมาถึง")
-        if not df.empty:
-            df["Start"] = pd.to_datetime(df["Date"] + " " + df["StartTime"])
-            df_upcoming = df[df["Start"] >= datetime.now()].sort_values("Start")
-            for i, row in df_upcoming.iterrows():
-                index = row.name
-                with st.expander(f"📌 {row['Date']} {row['StartTime']} - {row['EndTime']} | {row['Name']}"):
-                    with st.form(f"upcoming_edit_form_{index}"):
-                        col1, col2 = st.columns(2)
-                        name = col1.text_input("👤 Name", value=row["Name"])
-                        phone = col2.text_input("📞 Phone", value=row["Phone"])
-                        note = st.text_area("📝 Note", value=row["Note"])
-                        date = st.date_input("📅 Date", value=datetime.strptime(row["Date"], "%Y-%m-%d"))
-                        start_time = st.time_input("⏰ Start", value=datetime.strptime(row["StartTime"], "%H:%M").time())
-                        end_time = st.time_input("⏱ End", value=datetime.strptime(row["EndTime"], "%H:%M").time())
-                        col_btn1, col_btn2 = st.columns(2)
-                        if col_btn1.form_submit_button("💾 แก้ไข"):
-                            update_appointment(index, name, date.strftime("%Y-%m-%d"),
-                                               start_time.strftime("%H:%M"), end_time.strftime("%H:%M"),
-                                               phone, note)
-                            st.rerun()
-                        if col_btn2.form_submit_button("🗑️ ลบ"):
-                            delete_appointment(index)
-                            st.rerun()
-        else:
-            st.info("📭 ยังไม่มีนัดหมายถัดไป")
+        show_upcoming()
 
     # แผนภูมิเวลา
     elif menu == "📊 แผนภูมิเวลา":
         st.markdown("### 📊 แผนภูมิการนัดหมายแยกตามวัน")
-        if not df.empty:
-            df["Start"] = pd.to_datetime(df["Date"] + " " + df["StartTime"])
-            df["End"] = pd.to_datetime(df["Date"] + " " + df["EndTime"])
+        view = st.radio("มุมมอง", ["รายวัน", "ช่วงวันที่"], horizontal=True)
+        # Figures are cached as JSON and evicted only when a write touches their months
+        if view == "รายวัน":
             selected_date = st.date_input("📆 เลือกวันที่ต้องการดูนัดหมาย", value=datetime.today())
-            df_filtered = df[df["Start"].dt.date == selected_date]
-            if not df_filtered.empty:
-                fig = px.timeline(df_filtered, x_start="Start", x_end="End", y="Name", color="Name",
-                                  title=f"🕒 นัดหมายประจำวันที่ {selected_date.strftime('%d %B %Y')}", height=500)
-                fig.update_layout(xaxis_title="เวลา", yaxis_title="ลูกค้า",
-                                  xaxis=dict(type="date", tickformat="%H:%M"), template="plotly_white")
-                st.plotly_chart(fig, use_container_width=True)
-            else:
-                st.info(f"❗ ไม่มีนัดหมายในวันที่ {selected_date.strftime('%d %B %Y')}")
+            first_day = last_day = selected_date
+            fig_json = get_query_cache().get_or_compute(
+                "timeline_day", {"date": selected_date}, [selected_date],
+                lambda: day_timeline_json(selected_date))
+            empty_message = f"❗ ไม่มีนัดหมายในวันที่ {selected_date.strftime('%d %B %Y')}"
+        else:
+            col1, col2 = st.columns(2)
+            first_day = col1.date_input("📅 ตั้งแต่วันที่", value=datetime.today())
+            last_day = col2.date_input("📅 ถึงวันที่", value=datetime.today() + timedelta(days=6))
+            last_day = min(max(last_day, first_day), first_day + timedelta(days=MAX_TIMELINE_DAYS - 1))
+            fig_json = get_query_cache().get_or_compute(
+                "timeline_range", {"first": first_day, "last": last_day},
+                pd.date_range(first_day, last_day), lambda: range_timeline_json(first_day, last_day))
+            empty_message = "❗ ไม่มีนัดหมายในช่วงวันที่ที่เลือก"
+        if fig_json:
+            st.plotly_chart(pio.from_json(fig_json), use_container_width=True)
+        else:
+            st.info(empty_message)
+
+        with st.expander("🖨️ พิมพ์ตารางนัดหมายประจำวัน"):
+            fmt = st.radio("รูปแบบไฟล์", ["pdf", "png"], horizontal=True, format_func=str.upper)
+            if st.button("⚙️ สร้างแผ่นตาราง"):
+                progress = st.progress(0.0, text="กำลังเตรียมข้อมูล...")
+                with tempfile.TemporaryDirectory() as out_dir:
+                    # Unchanged days come from the page cache; the rest are rendered by worker processes
+                    paths = render_sheets(first_day.strftime("%Y-%m-%d"), last_day.strftime("%Y-%m-%d"), out_dir,
+                                          fmt=fmt, df=load_data(),
+                                          progress=lambda done, total, day: progress.progress(
+                                              done / total, text=f"{done}/{total} · {day or 'cache'}"))
+                    if len(paths) == 1:
+                        with open(paths[0], "rb") as f:
+                            sheet = (os.path.basename(paths[0]), f.read())
+                    else:
+                        buffer = io.BytesIO()
+                        with zipfile.ZipFile(buffer, "w") as archive:
+                            for path in paths:
+                                archive.write(path, os.path.basename(path))
+                        sheet = ("schedules.zip", buffer.getvalue())
+                st.session_state.schedule_sheet = sheet
+            if "schedule_sheet" in st.session_state:
+                file_name, data = st.session_state.schedule_sheet
+                st.download_button(f"📥 ดาวน์โหลด {file_name}", data, file_name=file_name)
+
+    # ความหนาแน่นรายสัปดาห์/เดือน
+    elif menu == "🔥 ความหนาแน่นรายสัปดาห์/เดือน":
+        st.markdown("### 🔥 ช่วงเวลาที่มีลูกค้าหนาแน่น")
+        span = st.radio("ช่วงเวลา", ["สัปดาห์", "เดือน"], horizontal=True)
+        anchor = st.date_input("📆 เลือกวันที่ในช่วงที่ต้องการดู", value=datetime.today())
+        if span == "สัปดาห์":
+            first_day = anchor - timedelta(days=anchor.weekday())
+            last_day = first_day + timedelta(days=6)
+        else:
+            first_day = anchor.replace(day=1)
+            last_day = (first_day + timedelta(days=32)).replace(day=1) - timedelta(days=1)
+        fig_json = get_query_cache().get_or_compute(
+            "heatmap", {"first": first_day, "last": last_day},
+            [first_day, last_day], lambda: heatmap_json(first_day, last_day))
+        st.plotly_chart(pio.from_json(fig_json), use_container_width=True)
+
+    # รายงานการใช้งาน
+    elif menu == "📈 รายงานการใช้งาน":
+        st.markdown("### 📈 รายงานชั่วโมงนวดและอัตราการใช้งาน")
+        level = st.radio("ช่วงเวลา", list(REPORT_LEVELS), index=2, horizontal=True)
+        # Reads only the pre-aggregated rollups, never the raw appointments
+        report = rollup_frame(current_rollups(FILE_NAME), REPORT_LEVELS[level])
+        if not report.empty:
+            col1, col2, col3 = st.columns(3)
+            col1.metric("จำนวนนัดหมาย", int(report["Appointments"].sum()))
+            col2.metric("ชั่วโมงที่จอง", f"{report['BookedHours'].sum():,.1f}")
+            col3.metric("อัตราการใช้งานเฉลี่ย", f"{report['Utilization'].mean():.0%}")
+            fig = px.bar(report, x="Period", y="BookedHours", hover_data=["Appointments"],
+                         title=f"⏱ ชั่วโมงที่จอง ({level})")
+            fig.update_layout(xaxis_title="ช่วงเวลา", yaxis_title="ชั่วโมง", template="plotly_white")
+            st.plotly_chart(fig, use_container_width=True)
+            fig = px.line(report, x="Period", y="Utilization", markers=True,
+                          title=f"📈 อัตราการใช้งาน ({level})")
+            fig.update_layout(xaxis_title="ช่วงเวลา", yaxis_title="อัตราการใช้งาน",
+                              yaxis=dict(tickformat=".0%"), template="plotly_white")
+            st.plotly_chart(fig, use_container_width=True)
         else:
             st.info("🔍 ไม่มีข้อมูลนัดหมายในระบบ")
 
+        with st.expander("📦 สร้างไฟล์ Excel แยกตามช่วงเวลา"):
+            partition = st.radio("แยกไฟล์", list(BATCH_REPORT_PARTITIONS), horizontal=True)
+            if st.button("⚙️ สร้างรายงาน"):
+                progress = st.progress(0.0, text="กำลังเตรียมข้อมูล...")
+                with tempfile.TemporaryDirectory() as out_dir:
+                    zip_path = os.path.join(out_dir, "reports.zip")
+                    # Workbooks are written in parallel by a process pool; progress arrives as each one finishes
+                    paths = generate_reports(load_data(), os.path.join(out_dir, "reports"),
+                                             by=BATCH_REPORT_PARTITIONS[partition], zip_path=zip_path,
+                                             progress=lambda done, total, name: progress.progress(
+                                                 done / total, text=f"{done}/{total} · {name}"))
+                    with open(zip_path, "rb") as f:
+                        st.session_state.batch_report_zip = (len(paths), f.read())
+            if "batch_report_zip" in st.session_state:
+                count, data = st.session_state.batch_report_zip
+                st.download_button(f"📥 ดาวน์โหลด {count} ไฟล์ (.zip)", data, file_name="appointment_reports.zip",
+                                   mime="application/zip")
+
+    # แก้ไขหลายรายการ
+    elif menu == "🗂 แก้ไขหลายรายการ":
+        st.markdown("### 🗂 แก้ไขหลายรายการพร้อมกัน")
+        col1, col2 = st.columns(2)
+        start_date = col1.date_input("📅 ตั้งแต่วันที่", value=datetime.today())
+        end_date = col2.date_input("📅 ถึงวันที่", value=datetime.today() + timedelta(days=7))
+        date_range = (start_date.strftime("%Y-%m-%d"), end_date.strftime("%Y-%m-%d"))
+
+        # The grid edits a snapshot; saving checks the snapshot still matches data.csv
+        if st.session_state.get("bulk_range") != date_range or "bulk_snapshot" not in st.session_state:
+            df = load_data()
+            in_range = df[(df["Date"] >= date_range[0]) & (df["Date"] <= date_range[1])]
+            st.session_state.bulk_range = date_range
+            st.session_state.bulk_snapshot = in_range.sort_values(by=["Date", "StartTime"])
+            # A fresh editor key drops edits made against the previous snapshot
+            st.session_state.bulk_generation = st.session_state.get("bulk_generation", 0) + 1
+        snapshot = st.session_state.bulk_snapshot
+
+        edited = st.data_editor(
+            snapshot, num_rows="dynamic", use_container_width=True, key=f"bulk_editor_{st.session_state.bulk_generation}",
+            column_config={
+                "Date": st.column_config.TextColumn("📅 Date", validate=r"^\d{4}-\d{2}-\d{2}$"),
+                "StartTime": st.column_config.TextColumn("⏰ Start", validate=r"^\d{2}:\d{2}$"),
+                "EndTime": st.column_config.TextColumn("⏱ End", validate=r"^\d{2}:\d{2}$"),
+            })
+        updates, deletes, inserts = diff_rows(snapshot, edited)
+        st.caption(f"แก้ไข {len(updates)} · ลบ {len(deletes)} · เพิ่ม {len(inserts)} รายการ")
+
+        if st.button("💾 บันทึกทั้งหมด", disabled=not (updates or deletes or inserts)):
+            df = load_data()
+            current = df.reindex(snapshot.index)[snapshot.columns]
+            if not current.fillna("").astype(str).equals(snapshot.fillna("").astype(str)):
+                st.error("⚠️ ข้อมูลถูกแก้ไขจากที่อื่นระหว่างนี้ กรุณาโหลดตารางใหม่แล้วแก้ไขอีกครั้ง")
+            else:
+                preview = apply_changes(df, updates, deletes, inserts, reset_ids=False)
+                touched = {row["Date"] for row in list(updates.values()) + inserts}
+                changed_ids = list(updates) + list(preview.index[len(preview) - len(inserts):])
+                errors = validate_appointments(preview, dates=touched, rows=changed_ids)
+                if errors:
+                    for message in errors[:MAX_ERRORS_SHOWN]:
+                        st.error(f"❌ {message}")
+                else:
+                    commit_batch(df, updates, deletes, inserts)
+                    del st.session_state.bulk_snapshot
+                    st.rerun()
+        if st.button("🔄 โหลดตารางใหม่"):
+            del st.session_state.bulk_snapshot
+            st.rerun()
+
+    # นำเข้าข้อมูล
+    elif menu == "📥 นำเข้าข้อมูล":
+        st.markdown("### 📥 นำเข้านัดหมายจากไฟล์ Excel / CSV")
+        uploaded = st.file_uploader("เลือกไฟล์", type=["xlsx", "csv"])
+        if uploaded is not None and st.button("🚀 เริ่มนำเข้า"):
+            os.makedirs(IMPORT_DIR, exist_ok=True)
+            source = os.path.join(IMPORT_DIR, os.path.basename(uploaded.name))
+            with open(source, "wb") as f:
+                f.write(uploaded.getbuffer())
+            status = st.empty()
+            # Rows are committed chunk by chunk; uploading the same file again resumes after the last chunk
+            result = import_file(source, FILE_NAME, progress=lambda c: status.info(
+                f"⏳ อ่านแล้ว {c['rows_read']:,} แถว · นำเข้า {c['imported']:,} · ไม่ผ่าน {c['rejected']:,}"))
+            status.success(f"✅ นำเข้า {result['imported']:,} รายการ · ไม่ผ่านการตรวจสอบ {result['rejected']:,} รายการ")
+            if result["rejected"]:
+                with open(source + ".rejected.csv", "rb") as f:
+                    st.download_button("📥 ดาวน์โหลดรายการที่ไม่ผ่าน", f.read(), file_name="rejected_rows.csv")
+            if result["imported"]:
+                export_to_excel(load_data())
+
 # ------------------------ Session Init ------------------------
 if "logged_in" not in st.session_state:
     st.session_state.logged_in = False
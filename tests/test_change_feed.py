@@ -0,0 +1,74 @@
+import os
+from change_feed import ChangeConsumer, compact, feed_path, offset_folder, publish_changes, read_events
+
+ROW = {"Name": "Ann", "Date": "2025-07-03", "StartTime": "09:00", "EndTime": "10:00", "Phone": "0812345678", "Note": ""}
+
+
+def publish(feed, count, start=0):
+    for i in range(start, start + count):
+        publish_changes((i, 0), (i + 1, 0), [(None, dict(ROW, Name=f"Client {i}"))], feed_file=feed)
+
+
+def test_feed_lives_next_to_the_csv(tmp_path):
+    store = str(tmp_path / "other.csv")
+    publish_changes((0, 0), (1, 0), [(None, ROW), (ROW, None)], file_name=store)
+    events = [event for event, _ in read_events(feed_file=feed_path(store))]
+    assert [(e["seq"], e["op"]) for e in events] == [(1, "create"), (2, "delete")]
+    assert events[0]["before"] == [0, 0] and events[0]["after"] == [1, 0]
+
+
+def test_consumer_offsets_survive_restarts(tmp_path):
+    feed = str(tmp_path / "data.csv.changes.jsonl")
+    publish(feed, 3)
+    consumer = ChangeConsumer("sync", feed)
+    assert [e["seq"] for e in consumer.poll(limit=2)] == [1, 2]
+    consumer.commit()
+
+    # Not committed: delivered again after a restart
+    restarted = ChangeConsumer("sync", feed)
+    assert [e["seq"] for e in restarted.poll()] == [3]
+    restarted = ChangeConsumer("sync", feed)
+    assert [e["seq"] for e in restarted.poll()] == [3]
+    restarted.commit()
+
+    publish(feed, 1, start=3)
+    assert [e["seq"] for e in ChangeConsumer("sync", feed).poll()] == [4]
+    assert [e["seq"] for e in ChangeConsumer("other", feed).poll()] == [1, 2, 3, 4]
+    assert os.listdir(offset_folder(feed)) == ["sync.json"]
+
+
+def test_compact_keeps_what_the_slowest_consumer_needs(tmp_path):
+    feed = str(tmp_path / "data.csv.changes.jsonl")
+    publish(feed, 5)
+    fast, slow = ChangeConsumer("fast", feed), ChangeConsumer("slow", feed)
+    fast.poll()
+    fast.commit()
+    slow.poll(limit=2)
+    slow.commit()
+
+    assert compact(feed) == 2
+    assert [e["seq"] for e, _ in read_events(feed_file=feed)] == [3, 4, 5]
+    # The saved byte position is stale after compaction; the consumer still resumes at seq 3
+    assert [e["seq"] for e in ChangeConsumer("slow", feed).poll()] == [3, 4, 5]
+
+
+def test_compact_keeps_the_last_event_and_sequence_continues(tmp_path):
+    feed = str(tmp_path / "data.csv.changes.jsonl")
+    publish(feed, 3)
+    consumer = ChangeConsumer("sync", feed)
+    consumer.poll()
+    consumer.commit()
+    assert compact(feed) == 2
+    publish(feed, 1, start=3)
+    assert [e["seq"] for e, _ in read_events(feed_file=feed)] == [3, 4]
+    assert [e["seq"] for e in ChangeConsumer("sync", feed).poll()] == [4]
+
+
+def test_torn_last_line_is_skipped_then_repaired(tmp_path):
+    feed = str(tmp_path / "data.csv.changes.jsonl")
+    publish(feed, 2)
+    with open(feed, "ab") as f:
+        f.write(b'{"seq": 3, "op": "cre')
+    assert [e["seq"] for e, _ in read_events(feed_file=feed)] == [1, 2]
+    publish(feed, 1, start=2)
+    assert [e["seq"] for e, _ in read_events(feed_file=feed)] == [1, 2, 3]
@@ -0,0 +1,68 @@
+import json
+import pandas as pd
+import pytest
+from appointment_store import COLUMNS, load_appointments
+from importer import checkpoint_path, import_file, normalize_chunk
+
+
+def test_normalize_dates_times_and_phones():
+    chunk = pd.DataFrame([
+        ["Ann", "07/03/2025", "9:05", "10:00:00", 812345678.0, "line\nbreak"],
+        ["Bob", "2025-07-04 00:00:00", "13:30", "14:00", "081-234-5678", ""],
+        ["Cat", "7/5/25", "08:00", "09:00", "(02) 123 4567", None],
+        ["Dan", "not a date", "later", "09:00", "1234", ""],
+    ], columns=COLUMNS)
+    df = normalize_chunk(chunk)
+    assert df["Date"].tolist() == ["2025-07-03", "2025-07-04", "2025-07-05", "not a date"]
+    assert df["StartTime"].tolist() == ["09:05", "13:30", "08:00", "later"]
+    assert df["EndTime"].tolist() == ["10:00", "14:00", "09:00", "09:00"]
+    # The lost leading zero comes back; short numbers are left alone
+    assert df["Phone"].tolist() == ["0812345678", "0812345678", "021234567", "1234"]
+    assert df["Note"].tolist() == ["line break", "", "", ""]
+
+
+class Interrupted(Exception):
+    pass
+
+
+def write_source(path, rows):
+    pd.DataFrame(rows, columns=COLUMNS).to_csv(path, index=False)
+
+
+def test_interrupted_import_resumes_after_last_checkpoint(tmp_path):
+    source = str(tmp_path / "import.csv")
+    store = str(tmp_path / "data.csv")
+    rows = [[f"Client {i}", f"2025-07-{i + 1:02d}", "09:00", "10:00", "0812345678", ""] for i in range(5)]
+    rows.append(["Client 0", "2025-07-01", "09:30", "10:30", "", ""])  # Duplicate and overlap: rejected
+    write_source(source, rows)
+
+    def stop_after_first_chunk(checkpoint):
+        raise Interrupted
+
+    with pytest.raises(Interrupted):
+        import_file(source, store, chunk_size=2, progress=stop_after_first_chunk)
+    with open(checkpoint_path(source), encoding="utf-8") as f:
+        assert json.load(f)["rows_read"] == 2
+    assert len(load_appointments(store)) == 2
+
+    seen = []
+    result = import_file(source, store, chunk_size=2, progress=lambda c: seen.append(c["rows_read"]))
+    assert seen == [4, 6]
+    assert (result["rows_read"], result["imported"], result["rejected"], result["done"]) == (6, 5, 1, True)
+    assert load_appointments(store)["Name"].tolist() == [f"Client {i}" for i in range(5)]
+    rejected = pd.read_csv(source + ".rejected.csv", dtype=str)
+    assert rejected["SourceRow"].tolist() == ["6"]
+
+    # Running a finished import again adds nothing
+    assert import_file(source, store, chunk_size=2)["imported"] == 5
+    assert len(load_appointments(store)) == 5
+
+
+def test_changed_source_ignores_old_checkpoint(tmp_path):
+    source = str(tmp_path / "import.csv")
+    store = str(tmp_path / "data.csv")
+    write_source(source, [["Ann", "2025-07-01", "09:00", "10:00", "", ""]])
+    import_file(source, store)
+    write_source(source, [["Bob", "2025-07-02", "09:00", "10:00", "", ""]])
+    assert import_file(source, store)["imported"] == 1
+    assert load_appointments(store)["Name"].tolist() == ["Ann", "Bob"]
@@ -0,0 +1,53 @@
+import pandas as pd
+from appointment_store import COLUMNS, data_version
+from rollups import apply_change, current_rollups, empty_rollups, rebuild_rollups, record_change, rollup_path
+
+
+def frame(*rows):
+    return pd.DataFrame(rows, columns=COLUMNS)
+
+
+def test_apply_change_matches_a_full_rebuild():
+    df = frame(("Ann", "2025-07-03", "09:00", "10:00", "", ""),
+               ("Bob", "2025-07-03", "13:00", "13:30", "", ""),
+               ("Cat", "2025-07-07", "09:00", "11:00", "", ""))
+    rollups = rebuild_rollups(df)
+    old = df.loc[1].to_dict()
+    new = dict(old, Date="2025-08-01", EndTime="14:00")
+    apply_change(rollups, old, new)
+    apply_change(rollups, new=dict(zip(COLUMNS, ("Dan", "2025-07-03", "15:00", "15:45", "", ""))))
+    apply_change(rollups, old=df.loc[2].to_dict())
+
+    expected = frame(("Ann", "2025-07-03", "09:00", "10:00", "", ""),
+                     ("Bob", "2025-08-01", "13:00", "14:00", "", ""),
+                     ("Dan", "2025-07-03", "15:00", "15:45", "", ""))
+    assert rollups == rebuild_rollups(expected)
+    assert rollups["daily"]["2025-07-03"] == {"count": 2, "minutes": 105.0}
+    assert "2025-07-07" not in rollups["daily"]
+    assert rollups["weekly"]["2025-W27"]["count"] == 2
+
+
+def test_unreadable_rows_are_ignored():
+    rollups = empty_rollups()
+    apply_change(rollups, new=dict(zip(COLUMNS, ("Ann", "07/03/2025", "09:00", "10:00", "", ""))))
+    assert rollups == empty_rollups()
+
+
+def test_record_change_applies_delta_or_rebuilds_when_out_of_sync(tmp_path):
+    store = str(tmp_path / "data.csv")
+    frame(("Ann", "2025-07-03", "09:00", "10:00", "", "")).to_csv(store, index=False)
+    assert current_rollups(store)["daily"] == {"2025-07-03": {"count": 1, "minutes": 60.0}}
+
+    before = data_version(store)
+    row = ("Bob", "2025-07-03", "11:00", "11:30", "", "")
+    frame(row).to_csv(store, mode="a", header=False, index=False)
+    after = data_version(store)
+    rollups = record_change(before, after, new=dict(zip(COLUMNS, row)), file_name=store)
+    assert rollups["daily"]["2025-07-03"] == {"count": 2, "minutes": 90.0}
+    assert rollups["version"] == list(after)
+
+    # A write the rollups never heard about: the stale "before" forces a rebuild from the CSV
+    frame(("Cat", "2025-07-04", "09:00", "10:00", "", "")).to_csv(store, mode="a", header=False, index=False)
+    rollups = record_change(before, data_version(store), file_name=store)
+    assert rollups["daily"]["2025-07-04"] == {"count": 1, "minutes": 60.0}
+    assert (tmp_path / "data.csv.rollups.json").exists() and rollup_path(store).endswith("data.csv.rollups.json")
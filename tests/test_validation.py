@@ -0,0 +1,48 @@
+import pandas as pd
+from validation import find_problems, validate_appointments
+
+
+def frame(*rows):
+    return pd.DataFrame(rows, columns=["Name", "Date", "StartTime", "EndTime", "Phone", "Note"])
+
+
+def test_overlap_names_both_rows():
+    df = frame(("Ann", "2025-07-03", "09:00", "10:00", "", ""),
+               ("Bob", "2025-07-03", "09:30", "10:30", "", ""))
+    problems = find_problems(df)
+    assert [ids for ids, _ in problems] == [[0, 1]]
+    assert "overlaps Ann" in problems[0][1]
+
+
+def test_back_to_back_and_other_days_do_not_overlap():
+    df = frame(("Ann", "2025-07-03", "09:00", "10:00", "", ""),
+               ("Bob", "2025-07-03", "10:00", "11:00", "", ""),
+               ("Cat", "2025-07-04", "09:30", "10:30", "", ""))
+    assert find_problems(df) == []
+
+
+def test_overlap_with_long_earlier_booking():
+    # Row 2 starts after row 1 ends but still inside row 0
+    df = frame(("Ann", "2025-07-03", "09:00", "12:00", "", ""),
+               ("Bob", "2025-07-03", "09:00", "09:30", "", ""),
+               ("Cat", "2025-07-03", "10:00", "10:30", "", ""))
+    assert sorted(ids for ids, _ in find_problems(df)) == [[0, 1], [0, 2]]
+
+
+def test_duplicate_name_on_same_day():
+    df = frame(("Ann", "2025-07-03", "09:00", "10:00", "", ""),
+               ("Ann", "2025-07-03", "13:00", "14:00", "", ""),
+               ("Ann", "2025-07-04", "09:00", "10:00", "", ""))
+    problems = find_problems(df)
+    assert [ids for ids, _ in problems] == [[0, 1]]
+    assert "Ann has more than one appointment on 2025-07-03" in problems[0][1]
+
+
+def test_rows_and_dates_limit_what_is_reported():
+    df = frame(("Ann", "2025-07-03", "09:00", "10:00", "", ""),
+               ("Bob", "2025-07-03", "09:30", "10:30", "", ""),
+               ("Cat", "2025-07-04", "11:00", "10:00", "", ""))
+    assert [ids for ids, _ in find_problems(df, rows=[2])] == [[2]]
+    assert [ids for ids, _ in find_problems(df, dates=["2025-07-03"])] == [[0, 1]]
+    messages = validate_appointments(df, rows=[1])
+    assert len(messages) == 1 and messages[0].startswith("Rows 0, 1: Bob (09:30-10:30) overlaps Ann")
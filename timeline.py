@@ -0,0 +1,79 @@
+import zlib
+import pandas as pd
+import plotly.graph_objects as go
+from plotly.colors import qualitative
+from lanes import assign_lanes
+
+# ------------------------ Configuration ------------------------
+PALETTE = qualitative.Plotly
+WEBGL_THRESHOLD = 300  # Range views with more bars than this are drawn with WebGL
+TIME_BASE = pd.Timestamp("2000-01-01")  # Shared day for plotting time-of-day across dates
+
+
+def name_colors(names):
+    """A stable colour per customer, so the same person keeps their colour across days."""
+    return [PALETTE[zlib.crc32(str(name).encode("utf-8")) % len(PALETTE)] for name in names]
+
+
+def hover_text(df):
+    return (df["Name"].astype(str) + "<br>" + df["Date"].astype(str) + " "
+            + df["StartTime"].astype(str) + "-" + df["EndTime"].astype(str)).tolist()
+
+
+# ------------------------ Figures ------------------------
+def day_timeline(df, title, group_by=None):
+    """
+    One horizontal bar trace for a day's appointments (needs Start/End
+    columns), coloured per customer, instead of px.timeline's trace per name.
+    Non-overlapping appointments share a lane and carry their name as bar
+    text, so the chart height follows the busiest moment, not the row count.
+    """
+    groups = df[group_by].to_numpy() if group_by else None
+    lanes, n_lanes = assign_lanes(df["Start"].to_numpy(), df["End"].to_numpy(), groups)
+    duration_ms = (df["End"] - df["Start"]).dt.total_seconds() * 1000
+    fig = go.Figure(go.Bar(
+        base=df["Start"], x=duration_ms, y=lanes, orientation="h", width=0.8,
+        marker_color=name_colors(df["Name"]), text=df["Name"], textposition="inside", insidetextanchor="start",
+        hovertext=hover_text(df), hoverinfo="text"))
+    fig.update_layout(title=title, height=max(250, 120 + 45 * n_lanes), xaxis_title="เวลา", yaxis_title="",
+                      xaxis=dict(type="date", tickformat="%H:%M"),
+                      yaxis=dict(showticklabels=False, range=[n_lanes - 0.5, -0.5]),
+                      template="plotly_white", showlegend=False)
+    return fig
+
+
+def range_timeline(df, start_date, end_date, title, height=600):
+    """
+    Appointments across several days with one row per day and time of day on
+    the x axis. Busy ranges switch to WebGL line segments, one trace per
+    palette colour, so thousands of bars stay responsive.
+    """
+    days = pd.date_range(start_date, end_date).strftime("%Y-%m-%d").tolist()
+    start = TIME_BASE + (df["Start"] - df["Start"].dt.normalize())
+    end = start + (df["End"] - df["Start"])
+    colors = name_colors(df["Name"])
+    text = hover_text(df)
+
+    if len(df) <= WEBGL_THRESHOLD:
+        duration_ms = (end - start).dt.total_seconds() * 1000
+        traces = [go.Bar(base=start, x=duration_ms, y=df["Date"], orientation="h",
+                         marker_color=colors, hovertext=text, hoverinfo="text")]
+    else:
+        traces = []
+        grouped = pd.DataFrame({"start": start, "end": end, "day": df["Date"], "color": colors, "text": text})
+        for color, group in grouped.groupby("color"):
+            # Each bar is a thick segment: start, end, gap
+            n = len(group)
+            x = pd.Series([None] * (3 * n), dtype=object)
+            x[0::3], x[1::3] = group["start"].tolist(), group["end"].tolist()
+            y = [value for day in group["day"] for value in (day, day, None)]
+            hover = [value for label in group["text"] for value in (label, label, None)]
+            traces.append(go.Scattergl(x=x.tolist(), y=y, mode="lines", line=dict(color=color, width=14),
+                                       hovertext=hover, hoverinfo="text"))
+
+    fig = go.Figure(traces)
+    fig.update_layout(title=title, height=height, xaxis_title="เวลา", yaxis_title="วันที่",
+                      xaxis=dict(type="date", tickformat="%H:%M"),
+                      yaxis=dict(type="category", categoryorder="array", categoryarray=days, autorange="reversed"),
+                      template="plotly_white", showlegend=False)
+    return fig
@@ -0,0 +1,215 @@
+import itertools
+import queue
+import sys
+import tkinter as tk
+from concurrent.futures import ThreadPoolExecutor
+
+# =============================================================================
+# --- Reusable Tkinter view helpers ---
+# =============================================================================
+
+class TreeviewSync:
+    """
+    Keeps a ttk.Treeview in step with a keyed list of rows. Only rows that
+    were added, changed, removed or moved touch the widget, and large lists
+    are applied in chunks through root.after so the window stays responsive.
+    """
+
+    def __init__(self, tree, root, chunk_size=200):
+        self.tree = tree
+        self.root = root
+        self.chunk_size = chunk_size
+        self.displayed = {}  # iid -> values tuple currently shown
+        self._job = None
+
+    def sync(self, rows):
+        """Shows `rows`, a list of (key, values) in display order."""
+        if self._job is not None:
+            self.root.after_cancel(self._job)
+            self._job = None
+
+        rows = [(str(key), tuple(values)) for key, values in rows]
+        wanted = {iid for iid, _ in rows}
+        stale = [iid for iid in self.displayed if iid not in wanted]
+        if stale:
+            self.tree.delete(*stale)
+            for iid in stale:
+                del self.displayed[iid]
+
+        # Moves are only needed if surviving rows changed their relative order
+        shown = [iid for iid in self.tree.get_children() if iid in wanted]
+        kept = [iid for iid, _ in rows if iid in self.displayed]
+        self._apply(rows, 0, shown != kept)
+
+    def _apply(self, rows, start, reorder):
+        end = min(start + self.chunk_size, len(rows))
+        for position in range(start, end):
+            iid, values = rows[position]
+            old = self.displayed.get(iid)
+            if old is None:
+                self.tree.insert("", position, iid=iid, values=values)
+            else:
+                if old != values:
+                    self.tree.item(iid, values=values)
+                if reorder:
+                    self.tree.move(iid, "", position)
+            self.displayed[iid] = values
+
+        if end < len(rows):
+            self._job = self.root.after(1, self._apply, rows, end, reorder)
+        else:
+            self._job = None
+
+
+class GanttChart:
+    """
+    One persistent matplotlib canvas for the daily Gantt chart. Bars are a
+    single collection updated in place, and a day whose rows have not changed
+    since the last draw is not redrawn at all.
+    """
+
+    def __init__(self, master, background, title_color, text_color, message_font):
+        self.master = master
+        self.background = background
+        self.title_color = title_color
+        self.text_color = text_color
+        self.message = tk.Label(master, bg=background, fg=text_color, font=message_font)
+        self.canvas = None
+        self._drawn = None
+
+    def _create_canvas(self):
+        # matplotlib is imported on first use so it does not slow down startup
+        from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+        from matplotlib.figure import Figure
+        from gantt import setup_axes
+        self.figure = Figure(figsize=(9, 4), dpi=100, facecolor=self.background)
+        self.ax = self.figure.add_subplot(111)
+        self.collection = setup_axes(self.ax, self.text_color)
+        self.texts = []
+        self.canvas = FigureCanvasTkAgg(self.figure, master=self.master)
+
+    def show_message(self, text):
+        if self.canvas is not None:
+            self.canvas.get_tk_widget().pack_forget()
+        self.message.configure(text=text)
+        self.message.pack(pady=20)
+        self._drawn = None
+
+    def show(self, df_data, selected_date):
+        """Draws one day's appointments, skipping the redraw if nothing on that day changed."""
+        columns = ["Name", "StartTime", "EndTime"]
+        day_version = (selected_date, tuple(map(tuple, df_data[columns].values.tolist())))
+        if day_version == self._drawn:
+            return
+        if df_data.empty:
+            self.show_message(f"No appointments for {selected_date}")
+            return
+
+        from gantt import draw_gantt, figure_height, gantt_layout
+        if self.canvas is None:
+            self._create_canvas()
+        layout = gantt_layout(df_data, selected_date)
+        draw_gantt(self.ax, self.collection, self.texts, layout,
+                   f"Appointment Schedule for {selected_date}", self.title_color)
+        height = figure_height(layout["rows"])
+        if self.figure.get_figheight() != height:
+            self.figure.set_figheight(height)
+            self.canvas.get_tk_widget().configure(height=int(height * self.figure.dpi))
+        self.figure.tight_layout()
+
+        self.message.pack_forget()
+        widget = self.canvas.get_tk_widget()
+        if not widget.winfo_manager():
+            widget.pack(fill='both', expand=True, padx=5, pady=2)
+        self.canvas.draw_idle()
+        self._drawn = day_version
+
+
+class BackgroundLoader:
+    """
+    Runs slow loading work (CSV reads, filtering, layout) on a thread pool and
+    hands results back to the Tk thread through a queue polled with
+    root.after, so callbacks are the only code that touches widgets. Each
+    request belongs to a channel; a newer request on the same channel cancels
+    the older one, or drops its result if it is already running. Work that
+    takes a while can report progress, which is delivered the same way.
+    Slow jobs (exports, reports, backups) run on their own pool so they never
+    hold up the quick loads behind a calendar click.
+    """
+
+    def __init__(self, root, on_busy=None, workers=2, slow_workers=4, poll_ms=30):
+        self.root = root
+        self.on_busy = on_busy
+        self.poll_ms = poll_ms
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="loader")
+        self.slow_executor = ThreadPoolExecutor(max_workers=slow_workers, thread_name_prefix="slow")
+        self.results = queue.Queue()
+        self.latest = {}  # channel -> (request id, future)
+        self._ids = itertools.count()
+        self._outstanding = 0
+        self._polling = False
+
+    def submit(self, channel, work, on_done, on_error=None, on_progress=None, slow=False):
+        """
+        Runs work() in the background, then on_done(result) or on_error(exception)
+        on the Tk thread. With on_progress, work is called as work(report) and
+        every report(*args) from the worker becomes on_progress(*args) on the Tk thread.
+        Pass slow=True for jobs that take seconds or more.
+        """
+        previous = self.latest.get(channel)
+        if previous is not None:
+            previous[1].cancel()
+        request_id = next(self._ids)
+        executor = self.slow_executor if slow else self.executor
+        if on_progress is not None:
+            report = lambda *args: self.results.put(("progress", channel, request_id, args, on_progress))
+            future = executor.submit(work, report)
+        else:
+            future = executor.submit(work)
+        self.latest[channel] = (request_id, future)
+        self._outstanding += 1
+        future.add_done_callback(lambda f: self.results.put(("done", channel, request_id, f, (on_done, on_error))))
+        if self.on_busy is not None and self._outstanding == 1:
+            self.on_busy(True)
+        if not self._polling:
+            self._polling = True
+            self.root.after(self.poll_ms, self._poll)
+
+    def _call(self, callback, *args, on_error=None):
+        # A callback that raises must not stop the rest of the queue from being delivered
+        try:
+            callback(*args)
+        except Exception as error:
+            if on_error is None:
+                self.root.report_callback_exception(*sys.exc_info())
+            else:
+                self._call(on_error, error)
+
+    def _poll(self):
+        try:
+            while True:
+                try:
+                    kind, channel, request_id, payload, callbacks = self.results.get_nowait()
+                except queue.Empty:
+                    break
+                if kind == "progress":
+                    if self.latest.get(channel, (None,))[0] == request_id:
+                        self._call(callbacks, *payload)
+                    continue
+                future, (on_done, on_error) = payload, callbacks
+                self._outstanding -= 1
+                if future.cancelled() or self.latest.get(channel, (None,))[0] != request_id:
+                    continue # Superseded by a newer request
+                del self.latest[channel]
+                error = future.exception()
+                if error is None:
+                    self._call(on_done, future.result(), on_error=on_error)
+                elif on_error is not None:
+                    self._call(on_error, error)
+        finally:
+            if self._outstanding > 0:
+                self.root.after(self.poll_ms, self._poll)
+            else:
+                self._polling = False
+                if self.on_busy is not None:
+                    self._call(self.on_busy, False)
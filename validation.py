@@ -0,0 +1,63 @@
+import pandas as pd
+
+
+# ------------------------ Appointment Rules ------------------------
+def validate_appointments(df, dates=None, rows=None):
+    """
+    Checks appointments with the same rules as the Tkinter form: valid
+    date/time fields, End Time after Start Time, one appointment per name
+    per day and no overlapping appointments on the same day. Only rows on
+    `dates` are checked (all rows if None), and with `rows` only problems
+    involving one of those row ids are reported, so existing bad data does
+    not block unrelated edits. Returns a list of error messages.
+    """
+    return [message for _, message in find_problems(df, dates, rows)]
+
+
+def find_problems(df, dates=None, rows=None):
+    """Same checks as validate_appointments, returning (row ids involved, message) pairs."""
+    if dates is not None:
+        df = df[df["Date"].isin(list(dates))]
+    if df.empty:
+        return []
+
+    problems = []  # (row ids involved, message)
+    start = pd.to_datetime(df["Date"].astype(str) + " " + df["StartTime"].astype(str), format="%Y-%m-%d %H:%M", errors="coerce")
+    end = pd.to_datetime(df["Date"].astype(str) + " " + df["EndTime"].astype(str), format="%Y-%m-%d %H:%M", errors="coerce")
+
+    missing_name = df["Name"].isna() | (df["Name"].astype(str).str.strip() == "")
+    for idx in df.index[missing_name]:
+        problems.append(([idx], f"Row {idx}: Name is required."))
+    bad_format = start.isna() | end.isna()
+    for idx in df.index[bad_format]:
+        problems.append(([idx], f"Row {idx}: Date must be YYYY-MM-DD and times HH:MM."))
+    bad_order = ~bad_format & (end <= start)
+    for idx in df.index[bad_order]:
+        problems.append(([idx], f"Row {idx}: End Time must be after Start Time."))
+
+    duplicated = ~missing_name & df.duplicated(["Name", "Date"], keep=False)
+    for (name, date), group in df[duplicated].groupby(["Name", "Date"]):
+        ids = list(group.index)
+        problems.append((ids, f"Rows {', '.join(map(str, ids))}: {name} has more than one appointment on {date}."))
+
+    # Sort by start within each day; a row overlaps if it starts before the latest end seen so far
+    timed = pd.DataFrame({"Date": df["Date"], "Name": df["Name"], "Start": start, "End": end})[~bad_format & ~bad_order]
+    timed = timed.sort_values(["Date", "Start"])
+    latest_end = timed.groupby("Date")["End"].cummax().groupby(timed["Date"]).shift()
+    overlap_days = timed.loc[timed["Start"] < latest_end, "Date"].unique()
+    # Only days that do overlap are walked row by row to name the conflicting pair
+    for _, day in timed[timed["Date"].isin(overlap_days)].groupby("Date"):
+        latest = None
+        for idx, row in day.iterrows():
+            if latest is not None and row["Start"] < day.at[latest, "End"]:
+                other = day.loc[latest]
+                first, second = sorted([latest, idx])
+                problems.append(([first, second], f"Rows {first}, {second}: {row['Name']} ({row['Start']:%H:%M}-{row['End']:%H:%M}) "
+                                                  f"overlaps {other['Name']} ({other['Start']:%H:%M}-{other['End']:%H:%M}) on {row['Date']}."))
+            if latest is None or row["End"] > day.at[latest, "End"]:
+                latest = idx
+
+    if rows is not None:
+        rows = set(rows)
+        problems = [p for p in problems if rows.intersection(p[0])]
+    return problems